@@ -4,8 +4,6 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session as DBSession
 
@@ -18,7 +16,7 @@ JWT_SECRET = os.getenv("JWT_SECRET", "change-me")
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_pwd_context = None
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
@@ -42,7 +40,19 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+def get_pwd_context():
+    # passlib/bcrypt and jose are imported on first use to keep startup fast.
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
     # RFC-compliant JWT subject should be a string.
     if "sub" in to_encode:
@@ -55,6 +65,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 def get_current_user(
     token: str = Depends(oauth2_scheme), db: DBSession = Depends(get_db)
 ) -> User:
+    from jose import JWTError, jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid credentials",
@@ -83,7 +95,7 @@ def register(req: RegisterRequest, db: DBSession = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
     user = User(
         email=req.email,
-        password_hash=pwd_context.hash(req.password),
+        password_hash=get_pwd_context().hash(req.password),
         name=req.name,
     )
     db.add(user)
@@ -95,7 +107,7 @@ def register(req: RegisterRequest, db: DBSession = Depends(get_db)):
 @router.post("/login", response_model=TokenResponse)
 def login(form: OAuth2PasswordRequestForm = Depends(), db: DBSession = Depends(get_db)):
     user = db.query(User).filter(User.email == form.username).first()
-    if not user or not pwd_context.verify(form.password, user.password_hash):
+    if not user or not get_pwd_context().verify(form.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     token = create_access_token({"sub": user.id})
     return TokenResponse(access_token=token)
@@ -0,0 +1,198 @@
+"""Synthetic data for the benchmark suite.
+
+    python -m benchmarks.dataset --size 100k --db /tmp/bench-100k.db
+
+Seeds users, products, completed sessions with transcripts, current scores
+and answer scores through bulk Core inserts. Session rows are spread over
+users so per-user endpoints see a realistic page while table sizes grow.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+from pathlib import Path
+
+from benchmarks.serialization import sentence
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+SESSIONS_PER_USER = 500
+ANSWERS_PER_SESSION = 3
+INSERT_CHUNK = 5000
+# Rows reuse a small pool of generated text; generation would otherwise dominate seeding.
+VARIANTS = 64
+
+
+def synthetic_product_data(rng: random.Random, usps: int = 20, terms: int = 40, objections: int = 15) -> dict:
+    return {
+        "extracted_usps": [{"title": sentence(rng, 3), "description": sentence(rng, 30)} for _ in range(usps)],
+        "key_terms": [{"term": sentence(rng, 2), "definition": sentence(rng, 20)} for _ in range(terms)],
+        "common_objections": [
+            {"objection": sentence(rng, 12), "suggested_response": sentence(rng, 30)} for _ in range(objections)
+        ],
+        "client_frames": {"skeptical_buyer": sentence(rng, 25), "busy_executive": sentence(rng, 25)},
+    }
+
+
+def synthetic_transcript(rng: random.Random, messages: int) -> list:
+    return [
+        {
+            "role": "user" if i % 2 else "assistant",
+            "message": sentence(rng, rng.randint(8, 60)),
+            "secondsFromStart": i * 5,
+            "duration": 4000,
+        }
+        for i in range(messages)
+    ]
+
+
+def synthetic_pdf(pages: int, lines_per_page: int = 45, seed: int = 0) -> bytes:
+    """A text-only PDF built by hand, so no PDF writer is needed to benchmark parsing."""
+    rng = random.Random(seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = " T* ".join(f"({sentence(rng, 12)}) Tj" for _ in range(lines_per_page))
+        stream = f"BT /F1 10 Tf 14 TL 40 780 Td {lines} ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _insert_chunks(conn, table, rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == INSERT_CHUNK:
+            conn.execute(table.insert(), chunk)
+            chunk = []
+    if chunk:
+        conn.execute(table.insert(), chunk)
+
+
+def seed(bind, sessions: int, sessions_per_user: int = SESSIONS_PER_USER, seed: int = 0) -> dict:
+    """Fill an empty database. User 1 is the one the benchmarks act as."""
+    from database import Base
+    from models import User, Product, Session, Score, AnswerScore
+
+    rng = random.Random(seed)
+    users = max(1, -(-sessions // sessions_per_user))
+    personalities = ["skeptical_buyer", "analytical_decision_maker", "busy_executive", "technical_expert"]
+    product_data = synthetic_product_data(rng)
+    transcripts = [synthetic_transcript(rng, rng.randint(8, 24)) for _ in range(VARIANTS)]
+    answers = [(sentence(rng, 12), sentence(rng, 20), sentence(rng, 18)) for _ in range(VARIANTS)]
+    feedback = {
+        "per_answer_feedback": [
+            {"question": q, "answer_summary": a, "score": 60, "feedback": f, "improvement": f}
+            for q, a, f in answers[:ANSWERS_PER_SESSION]
+        ],
+        "strengths": [sentence(rng, 10) for _ in range(3)],
+        "improvements": [sentence(rng, 12) for _ in range(3)],
+        "rambling_instances": 1,
+    }
+    started = datetime.datetime(2025, 1, 1)
+
+    def session_rows():
+        for i in range(1, sessions + 1):
+            yield {
+                "id": i,
+                "user_id": (i - 1) // sessions_per_user + 1,
+                "product_id": (i - 1) // sessions_per_user + 1,
+                "personality_type": personalities[i % len(personalities)],
+                "vapi_call_id": f"call-{i}",
+                "transcript": transcripts[i % VARIANTS],
+                "status": "completed",
+                "created_at": started + datetime.timedelta(minutes=i),
+            }
+
+    def score_rows():
+        for i in range(1, sessions + 1):
+            base = 40 + i % 50
+            yield {
+                "session_id": i, "version": "bench", "is_current": True,
+                "term_understanding": base, "description_breadth": base + 3, "conciseness": base - 5,
+                "objection_handling": base + 1, "usp_framing": base + 2, "confidence": base - 1,
+                "overall": base, "detailed_feedback": feedback,
+                "created_at": started + datetime.timedelta(minutes=i, seconds=30),
+            }
+
+    def answer_rows():
+        for i in range(1, sessions + 1):
+            for j in range(ANSWERS_PER_SESSION):
+                question, summary, text = answers[(i + j) % VARIANTS]
+                yield {
+                    "session_id": i, "question": question, "answer_summary": summary,
+                    "term_accuracy": 50 + j, "conciseness": 55 + j, "framing_quality": 60 + j, "feedback": text,
+                    "created_at": started + datetime.timedelta(minutes=i, seconds=j),
+                }
+
+    Base.metadata.create_all(bind)
+    with bind.begin() as conn:
+        _insert_chunks(conn, User.__table__, (
+            {"id": u, "email": f"rep{u}@example.com", "password_hash": "x", "name": f"Rep {u}"}
+            for u in range(1, users + 1)
+        ))
+        _insert_chunks(conn, Product.__table__, (
+            {
+                "id": u, "user_id": u, "name": f"Product {u}", "raw_text": "synthetic",
+                **product_data,
+                "usps_count": len(product_data["extracted_usps"]),
+                "terms_count": len(product_data["key_terms"]),
+                "objections_count": len(product_data["common_objections"]),
+            }
+            for u in range(1, users + 1)
+        ))
+        _insert_chunks(conn, Session.__table__, session_rows())
+        _insert_chunks(conn, Score.__table__, score_rows())
+        _insert_chunks(conn, AnswerScore.__table__, answer_rows())
+    return {"sessions": sessions, "sessions_per_user": sessions_per_user, "users": users, "seed": seed}
+
+
+def ensure_dataset(db_path: Path, sessions: int, sessions_per_user: int = SESSIONS_PER_USER) -> dict:
+    """Reuse a previously seeded file when it matches; seeding 1M rows takes a while.
+
+    DATABASE_URL must already point at db_path when this is called.
+    """
+    meta_path = db_path.with_name(db_path.name + ".json")
+    if db_path.exists() and meta_path.exists():
+        meta = json.loads(meta_path.read_text())
+        if meta.get("sessions") == sessions and meta.get("sessions_per_user") == sessions_per_user:
+            return meta
+    db_path.unlink(missing_ok=True)
+
+    from database import engine
+
+    meta = seed(engine, sessions, sessions_per_user)
+    meta_path.write_text(json.dumps(meta))
+    return meta
+
+
+def database_path(size: str) -> Path:
+    return Path(os.getenv("BENCH_DATA_DIR", "/tmp")) / f"bench-{size}.db"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed a synthetic benchmark database.")
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--db", type=Path)
+    parser.add_argument("--sessions-per-user", type=int, default=SESSIONS_PER_USER)
+    args = parser.parse_args()
+
+    path = args.db or database_path(args.size)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    print(ensure_dataset(path, SIZES[args.size], args.sessions_per_user))
@@ -0,0 +1,119 @@
+"""Serialization time and response size for large GET /sessions/{id} payloads.
+
+    python -m benchmarks.serialization
+
+Compares FastAPI's default path (jsonable_encoder + json.dumps, as used by
+JSONResponse) against ORJSONResponse, and reports bytes on the wire raw and
+with the gzip level used by GZipMiddleware.
+"""
+import gzip
+import json
+import random
+import timeit
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from responses import ORJSONResponse
+
+WORDS = (
+    "pricing value integration onboarding security latency roadmap support "
+    "contract renewal discount budget quarter team workflow analytics dashboard"
+).split()
+GZIP_LEVEL = 6
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_session(messages: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    transcript = [
+        {
+            "role": "user" if i % 2 else "bot",
+            "message": sentence(rng, rng.randint(8, 80)),
+            "time": 1_700_000_000_000 + i * 5000,
+            "endTime": 1_700_000_000_000 + i * 5000 + 4000,
+            "secondsFromStart": i * 5,
+            "duration": 4000,
+        }
+        for i in range(messages)
+    ]
+    answers = messages // 2
+    return {
+        "id": 1,
+        "product_name": "Synthetic Product",
+        "personality_type": "skeptical_buyer",
+        "status": "completed",
+        "transcript": transcript,
+        "created_at": "2026-01-01T00:00:00",
+        "scores": {
+            "term_understanding": 61.0,
+            "description_breadth": 55.0,
+            "conciseness": 48.0,
+            "objection_handling": 66.0,
+            "usp_framing": 58.0,
+            "confidence": 62.0,
+            "overall": 57.0,
+            "detailed_feedback": {
+                "per_answer_feedback": [
+                    {
+                        "question": sentence(rng, 12),
+                        "answer_summary": sentence(rng, 20),
+                        "score": rng.randint(30, 90),
+                        "feedback": sentence(rng, 25),
+                        "improvement": sentence(rng, 20),
+                    }
+                    for _ in range(answers)
+                ],
+                "strengths": [sentence(rng, 10) for _ in range(3)],
+                "improvements": [sentence(rng, 12) for _ in range(5)],
+                "rambling_instances": 4,
+            },
+        },
+        "answer_scores": [
+            {
+                "question": sentence(rng, 12),
+                "answer_summary": sentence(rng, 20),
+                "term_accuracy": 60.0,
+                "conciseness": 50.0,
+                "framing_quality": 55.0,
+                "feedback": sentence(rng, 18),
+            }
+            for _ in range(answers)
+        ],
+    }
+
+
+def default_render(payload: dict) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def orjson_render(payload: dict) -> bytes:
+    return ORJSONResponse(payload).body
+
+
+def best_ms(fn, payload: dict, number: int) -> float:
+    return min(timeit.repeat(lambda: fn(payload), number=number, repeat=5)) / number * 1000
+
+
+def main():
+    print(f"{'messages':>8} {'default ms':>11} {'orjson ms':>10} {'speedup':>8} {'raw KB':>8} {'gzip KB':>8}")
+    for messages in (100, 1000, 5000):
+        payload = synthetic_session(messages)
+        assert json.loads(default_render(payload)) == orjson.loads(orjson_render(payload))
+        number = max(1, 2000 // messages)
+        default_ms = best_ms(default_render, payload, number)
+        orjson_ms = best_ms(orjson_render, payload, number)
+        body = orjson_render(payload)
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        print(
+            f"{messages:>8} {default_ms:>11.2f} {orjson_ms:>10.2f} {default_ms / orjson_ms:>7.1f}x "
+            f"{len(body) / 1024:>8.1f} {len(compressed) / 1024:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
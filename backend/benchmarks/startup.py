@@ -0,0 +1,110 @@
+"""Cold-start cost: import time breakdown and time to first healthy response.
+
+    python -m benchmarks.startup            # human-readable
+    python -m benchmarks.startup --json     # one JSON line, for tracking across releases
+
+Runs everything in fresh subprocesses against a throwaway SQLite database,
+so results reflect a real cold boot rather than this interpreter's caches.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+HEALTH_TIMEOUT_SECONDS = 60
+
+
+def _env(db_path: str) -> dict:
+    return dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+
+
+def import_breakdown(env: dict, top: int) -> dict:
+    """Cumulative import time of `main` and its slowest top-level packages."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if not cumulative.strip().isdigit() or "." in name:
+            continue
+        # Root modules only; cumulative time includes everything they pulled in.
+        packages[name] = max(packages.get(name, 0), int(cumulative))
+    total_us = packages.pop("main", 0)
+    slowest = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {
+        "import_main_ms": round(total_us / 1000, 1),
+        "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in slowest},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_healthy(env: dict) -> float:
+    """Seconds from spawning uvicorn until GET /health returns 200."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < HEALTH_TIMEOUT_SECONDS:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited before becoming healthy")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("timed out waiting for /health")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(os.path.join(tmp, "bench.db"))
+        breakdown = import_breakdown(env, args.top)
+        healthy = [time_to_healthy(env) for _ in range(args.runs)]
+
+    report = {
+        **breakdown,
+        "time_to_healthy_ms": round(min(healthy) * 1000, 1),
+        "time_to_healthy_runs_ms": [round(s * 1000, 1) for s in healthy],
+    }
+    if args.json:
+        print(json.dumps(report))
+        return
+
+    print(f"import main: {report['import_main_ms']} ms")
+    for name, ms in report["slowest_imports_ms"].items():
+        print(f"  {name:<24} {ms:>8} ms")
+    print(f"time to first healthy response: {report['time_to_healthy_ms']} ms (best of {args.runs})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Hot-path micro-benchmarks against a synthetic dataset, with regression checks.
+
+    python -m benchmarks.suite --size 10k --save-baseline   # record this machine's numbers
+    python -m benchmarks.suite --size 10k                   # compare; exits 1 on regression
+    python -m benchmarks.suite --size 100k --only list_sessions get_session
+
+Endpoints are driven through the ASGI app with a TestClient, so routing,
+auth, queries and serialization are all included. Baselines are per size
+and per machine: record them on the host that runs the comparison.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.dataset import SIZES, database_path, ensure_dataset, synthetic_pdf, synthetic_product_data
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+REGRESSION_THRESHOLD = 0.25
+PDF_PAGES = 200
+CALL_EVENTS = 2000
+FLUSH_EVERY = 10
+
+
+def build_benchmarks(client, headers: dict, meta: dict) -> dict:
+    """name -> (callable, calls per timed run)."""
+    from services.personality import build_system_prompt
+    from services.transcript_buffer import TranscriptBuffer
+    from routers.products import parse_upload
+
+    own_session_id = meta["sessions_per_user"] // 2
+    product_data = synthetic_product_data(random.Random(1))
+    pdf = synthetic_pdf(PDF_PAGES)
+
+    def get(path: str):
+        def call():
+            response = client.get(path, headers=headers)
+            assert response.status_code == 200, response.text
+        return call
+
+    def transcript_assembly():
+        # A long call through the coalescing buffer, persisted the way the webhook does.
+        buffer = TranscriptBuffer(flush_seconds=float("inf"))
+        transcript = []
+        for i in range(CALL_EVENTS):
+            role = "user" if i // 20 % 2 else "assistant"
+            is_final = i % 4 == 3
+            buffer.add("bench", role, f"segment {i} of the live call", is_final, now=0)
+            if is_final and i % (4 * FLUSH_EVERY) == 3:
+                transcript = transcript + buffer.take("bench")
+        transcript = transcript + buffer.take("bench", include_partials=True)
+
+    return {
+        "get_dashboard": (get("/scores/dashboard"), 5),
+        "list_sessions": (get("/sessions/"), 5),
+        "get_session": (get(f"/sessions/{own_session_id}"), 20),
+        "build_system_prompt": (lambda: build_system_prompt("skeptical_buyer", product_data), 200),
+        "parse_upload_pdf": (lambda: parse_upload(pdf, "large.pdf"), 1),
+        "transcript_assembly": (transcript_assembly, 5),
+    }
+
+
+def measure(fn, number: int, repeat: int) -> dict:
+    fn()  # warm caches, lazy imports and the connection pool
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - started) / number * 1000)
+    return {"median_ms": round(statistics.median(runs), 3), "min_ms": round(min(runs), 3)}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and result["median_ms"] > before["median_ms"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--db", type=Path, help="Seeded database to use (created if missing)")
+    parser.add_argument("--only", nargs="*", help="Benchmark names to run")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--baseline", type=Path, help="Defaults to benchmarks/baselines/<size>.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Allowed slowdown of the median before failing, as a fraction")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    db_path = args.db or database_path(args.size)
+    # Must be set before anything imports database.
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    meta = ensure_dataset(db_path, SIZES[args.size])
+
+    from fastapi.testclient import TestClient
+    from auth import create_access_token
+    from main import app
+
+    results = {}
+    with TestClient(app) as client:
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 1})}"}
+        for name, (fn, number) in build_benchmarks(client, headers, meta).items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = measure(fn, number, args.repeat)
+
+    baseline_path = args.baseline or BASELINE_DIR / f"{args.size}.json"
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    regressions = [] if args.save_baseline else compare(results, baseline, args.threshold)
+
+    if args.json:
+        print(json.dumps({"size": args.size, "results": results, "regressions": regressions}))
+    else:
+        print(f"{'benchmark':<22} {'median ms':>10} {'min ms':>9} {'baseline':>9} {'change':>8}")
+        for name, result in results.items():
+            before = baseline.get(name, {}).get("median_ms")
+            change = f"{(result['median_ms'] / before - 1) * 100:+.0f}%" if before else "-"
+            flag = "  REGRESSION" if name in regressions else ""
+            print(f"{name:<22} {result['median_ms']:>10.3f} {result['min_ms']:>9.3f} {before or '-':>9} {change:>8}{flag}")
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({**baseline, **results}, indent=2) + "\n")
+        print(f"baseline saved to {baseline_path}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
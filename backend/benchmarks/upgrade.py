@@ -0,0 +1,136 @@
+"""Schema upgrade check: boot against a database created by the original schema.
+
+    python -m benchmarks.upgrade            # exits 1 if the upgrade fails
+    python -m benchmarks.upgrade --json
+
+There are no migrations; init_db() adds columns and indexes to existing
+tables at startup. This seeds a throwaway SQLite file with the first
+release's tables and a few rows, runs init_db() in a fresh subprocess,
+and checks every model column exists and the seeded rows still load.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Schema as created by the first release, before any columns were added.
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL, email VARCHAR NOT NULL, password_hash VARCHAR NOT NULL,
+    name VARCHAR NOT NULL, created_at DATETIME, PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE INDEX ix_users_id ON users (id);
+CREATE TABLE products (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, name VARCHAR NOT NULL, raw_text TEXT NOT NULL,
+    extracted_usps JSON, key_terms JSON, common_objections JSON, client_frames JSON, created_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE INDEX ix_products_id ON products (id);
+CREATE TABLE sessions (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, product_id INTEGER NOT NULL,
+    personality_type VARCHAR NOT NULL, vapi_call_id VARCHAR, transcript JSON, status VARCHAR, created_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id), FOREIGN KEY(product_id) REFERENCES products (id)
+);
+CREATE INDEX ix_sessions_id ON sessions (id);
+CREATE TABLE scores (
+    id INTEGER NOT NULL, session_id INTEGER NOT NULL, term_understanding FLOAT, description_breadth FLOAT,
+    conciseness FLOAT, objection_handling FLOAT, usp_framing FLOAT, confidence FLOAT, overall FLOAT,
+    detailed_feedback JSON, created_at DATETIME,
+    PRIMARY KEY (id), UNIQUE (session_id), FOREIGN KEY(session_id) REFERENCES sessions (id)
+);
+CREATE INDEX ix_scores_id ON scores (id);
+CREATE TABLE answer_scores (
+    id INTEGER NOT NULL, session_id INTEGER NOT NULL, question TEXT NOT NULL, answer_summary TEXT NOT NULL,
+    term_accuracy FLOAT, conciseness FLOAT, framing_quality FLOAT, feedback TEXT, created_at DATETIME,
+    PRIMARY KEY (id), FOREIGN KEY(session_id) REFERENCES sessions (id)
+);
+CREATE INDEX ix_answer_scores_id ON answer_scores (id);
+INSERT INTO users VALUES (1, 'rep@example.com', 'x', 'Rep', '2024-01-01 00:00:00');
+INSERT INTO products VALUES (1, 1, 'Product', 'Body', '[]', '[]', '[]', '{}', '2024-01-01 00:00:00');
+INSERT INTO sessions VALUES (1, 1, 1, 'busy_executive', 'call-1', '[]', 'completed', '2024-01-01 00:00:00');
+INSERT INTO scores VALUES (1, 1, 50, 50, 50, 50, 50, 50, 50, '{}', '2024-01-01 00:00:00');
+"""
+
+# Runs in the subprocess: upgrade, then read back what the app relies on.
+UPGRADE_SCRIPT = """
+import json, time
+from sqlalchemy import inspect
+started = time.perf_counter()
+import main
+main.init_db()
+elapsed = time.perf_counter() - started
+from database import Base, SessionLocal, engine
+from models import Product, Score
+inspector = inspect(engine)
+missing = [
+    f"{table.name}.{column.name}"
+    for table in Base.metadata.sorted_tables
+    for column in table.columns
+    if column.name not in {c["name"] for c in inspector.get_columns(table.name)}
+]
+db = SessionLocal()
+product, score = db.get(Product, 1), db.get(Score, 1)
+print(json.dumps({
+    "upgrade_ms": round(elapsed * 1000, 1),
+    "missing_columns": missing,
+    "product_version": product.version,
+    "score_status": score.status,
+    "score_is_current": score.is_current,
+}))
+"""
+
+EXPECTED = {"product_version": 1, "score_status": "complete", "score_is_current": True}
+
+
+def run_upgrade(db_path: str) -> dict:
+    conn = sqlite3.connect(db_path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.close()
+    result = subprocess.run(
+        [sys.executable, "-c", UPGRADE_SCRIPT],
+        cwd=BACKEND_DIR,
+        env=dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}"),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "exit %d" % result.returncode}
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    problems = [f"{key}={report[key]!r}, expected {value!r}" for key, value in EXPECTED.items() if report[key] != value]
+    if report["missing_columns"]:
+        problems.append(f"missing columns {report['missing_columns']}")
+    if problems:
+        report["error"] = "; ".join(problems)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        report = run_upgrade(os.path.join(tmp, "baseline.db"))
+        report["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    if args.json:
+        print(json.dumps(report))
+    elif "error" in report:
+        print(f"upgrade FAILED: {report['error']}")
+    else:
+        print(f"upgrade ok in {report['upgrade_ms']} ms (total {report['total_ms']} ms)")
+    if "error" in report:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import base64
+import json
+import zlib
+
+from sqlalchemy import JSON, Text
+from sqlalchemy.types import TypeDecorator
+
+COMPRESSED_PREFIX = "zlib:"
+COMPRESSION_LEVEL = 6
+
+
+def compress_text(value: str) -> str:
+    packed = zlib.compress(value.encode("utf-8"), COMPRESSION_LEVEL)
+    return COMPRESSED_PREFIX + base64.b64encode(packed).decode("ascii")
+
+
+def decompress_text(value: str) -> str:
+    if not value.startswith(COMPRESSED_PREFIX):
+        return value
+    packed = base64.b64decode(value[len(COMPRESSED_PREFIX):])
+    return zlib.decompress(packed).decode("utf-8")
+
+
+def compress_json(value) -> str:
+    return compress_text(json.dumps(value, separators=(",", ":")))
+
+
+class CompressedText(TypeDecorator):
+    """Text column that is always written zlib-compressed.
+
+    Values are stored base64-encoded behind a prefix, so the column stays a
+    plain TEXT column and rows written before compression still read back.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
+
+
+class ArchivableJSON(TypeDecorator):
+    """JSON column whose value may be replaced by a compressed JSON string.
+
+    Live rows are written as normal JSON. Archival binds compress_json(value)
+    instead, and reads transparently decompress it back.
+    """
+
+    impl = JSON
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, str) and value.startswith(COMPRESSED_PREFIX):
+            return json.loads(decompress_text(value))
+        return value
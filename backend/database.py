@@ -1,5 +1,6 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text, UniqueConstraint
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
@@ -7,11 +8,90 @@ load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./calling_coach.db")
 
+
+def get_async_database_url(url: str) -> str:
+    # Same database as the sync engine, reached through an async driver.
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", get_async_database_url(DATABASE_URL))
+
 connect_args = {"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
 engine = create_engine(DATABASE_URL, connect_args=connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def add_missing_columns(bind=engine):
+    # create_all() never alters existing tables, so add columns and indexes
+    # introduced after a table was first created. New columns must be nullable.
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    if isinstance(default, str):
+                        # Plain strings are literals, as create_all() renders them.
+                        default = "'" + default.replace("'", "''") + "'"
+                    else:
+                        default = default.compile(dialect=bind.dialect)
+                    ddl += f" DEFAULT {default}"
+                conn.execute(text(ddl))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def drop_stale_unique_constraints(bind=engine):
+    # Unique constraints removed from a model are dropped from existing tables.
+    # SQLite cannot drop constraints, so the table is rebuilt from the model.
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        declared = {
+            frozenset(c.name for c in constraint.columns)
+            for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+        }
+        declared |= {frozenset([c.name]) for c in table.columns if c.unique}
+        stale = [
+            u for u in inspector.get_unique_constraints(table.name)
+            if frozenset(u["column_names"]) not in declared
+        ]
+        if not stale:
+            continue
+
+        with bind.begin() as conn:
+            if bind.dialect.name == "sqlite":
+                existing = {c["name"] for c in inspector.get_columns(table.name)}
+                columns = ", ".join(c.name for c in table.columns if c.name in existing)
+                for index in inspector.get_indexes(table.name):
+                    conn.execute(text(f"DROP INDEX {index['name']}"))
+                conn.execute(text(f"ALTER TABLE {table.name} RENAME TO _{table.name}_old"))
+                table.create(conn)
+                conn.execute(text(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM _{table.name}_old"))
+                conn.execute(text(f"DROP TABLE _{table.name}_old"))
+            else:
+                for constraint in stale:
+                    conn.execute(text(f"ALTER TABLE {table.name} DROP CONSTRAINT {constraint['name']}"))
+
 
 def get_db():
     db = SessionLocal()
@@ -19,3 +99,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,24 +1,44 @@
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
 
-from database import engine, Base
+from database import engine, Base, add_missing_columns, drop_stale_unique_constraints
 from auth import router as auth_router
 from routers.products import router as products_router
 from routers.sessions import router as sessions_router
 from routers.scores import router as scores_router
 from routers.webhook import router as webhook_router
+from routers.search import router as search_router
+from routers.export import router as export_router
+from services.search import create_search_index
+from spa import SPAFiles
 
-Base.metadata.create_all(bind=engine)
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
 
-app = FastAPI(title="Calling Coach API", version="1.0.0")
+
+def init_db():
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    drop_stale_unique_constraints()
+    create_search_index(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # DDL runs once the server starts rather than at import time.
+    await run_in_threadpool(init_db)
+    yield
+
+
+app = FastAPI(title="Calling Coach API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,12 +47,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=6)
 
 app.include_router(auth_router)
 app.include_router(products_router)
 app.include_router(sessions_router)
 app.include_router(scores_router)
 app.include_router(webhook_router)
+app.include_router(search_router)
+app.include_router(export_router)
 
 
 @app.get("/health")
@@ -43,11 +66,5 @@ def health():
 STATIC_DIR = Path(__file__).parent / "static"
 
 if STATIC_DIR.is_dir():
-    app.mount("/assets", StaticFiles(directory=STATIC_DIR / "assets"), name="static-assets")
-
-    @app.get("/{full_path:path}")
-    async def serve_spa(request: Request, full_path: str):
-        file_path = STATIC_DIR / full_path
-        if file_path.is_file():
-            return FileResponse(file_path)
-        return FileResponse(STATIC_DIR / "index.html")
+    spa_files = SPAFiles(STATIC_DIR)
+    app.add_api_route("/{full_path:path}", spa_files.serve, methods=["GET"], include_in_schema=False)
@@ -1,7 +1,8 @@
 import datetime
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, JSON, Index, Boolean, text, true
 from sqlalchemy.orm import relationship
 from database import Base
+from column_types import CompressedText, ArchivableJSON
 
 
 class User(Base):
@@ -23,40 +24,65 @@ class Product(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     name = Column(String, nullable=False)
-    raw_text = Column(Text, nullable=False)
+    raw_text = Column(CompressedText, nullable=False)
     extracted_usps = Column(JSON, default=list)
     key_terms = Column(JSON, default=list)
     common_objections = Column(JSON, default=list)
     client_frames = Column(JSON, default=dict)
+    # Per-section hashes and the items extracted from each; see services.product_sections.
+    sections = Column(JSON, nullable=True)
+    # Maintained on write so list views never load the JSON columns.
+    usps_count = Column(Integer, nullable=True)
+    terms_count = Column(Integer, nullable=True)
+    objections_count = Column(Integer, nullable=True)
+    # Bumped on every content change; drives the product ETag.
+    version = Column(Integer, default=1, server_default=text("1"), nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, nullable=True)
+    # Set when deletion is requested; the rows are purged in batches afterwards.
+    deleted_at = Column(DateTime, nullable=True)
 
     user = relationship("User", back_populates="products")
     sessions = relationship("Session", back_populates="product")
 
+    def update_counts(self):
+        self.usps_count = len(self.extracted_usps or [])
+        self.terms_count = len(self.key_terms or [])
+        self.objections_count = len(self.common_objections or [])
+
 
 class Session(Base):
     __tablename__ = "sessions"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     personality_type = Column(String, nullable=False)
     vapi_call_id = Column(String, nullable=True)
-    transcript = Column(JSON, default=list)
+    transcript = Column(ArchivableJSON, default=list)
     status = Column(String, default="pending")
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    archived_at = Column(DateTime, nullable=True)
 
     user = relationship("User", back_populates="sessions")
     product = relationship("Product", back_populates="sessions")
-    scores = relationship("Score", back_populates="session", uselist=False)
+    scores = relationship("Score", back_populates="session")
     answer_scores = relationship("AnswerScore", back_populates="session")
+    speech_metrics = relationship("SpeechMetrics", back_populates="session", uselist=False)
 
 
 class Score(Base):
     __tablename__ = "scores"
 
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(Integer, ForeignKey("sessions.id"), unique=True, nullable=False)
+    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False, index=True)
+    # One row per scoring version; is_current marks the one the app shows.
+    version = Column(String, nullable=True)
+    is_current = Column(Boolean, default=True, server_default=true(), nullable=True)
+    # "scoring" while a streamed result is still being filled in; such rows are never current.
+    status = Column(String, default="complete", server_default=text("'complete'"), nullable=True)
+    # When the scoring run that owns a "scoring" row claimed it; doubles as its owner token.
+    claimed_at = Column(DateTime, nullable=True)
     term_understanding = Column(Float, default=0)
     description_breadth = Column(Float, default=0)
     conciseness = Column(Float, default=0)
@@ -69,12 +95,35 @@ class Score(Base):
 
     session = relationship("Session", back_populates="scores")
 
+    __table_args__ = (Index("ix_scores_session_version", "session_id", "version", unique=True),)
+
+
+class SpeechMetrics(Base):
+    """Locally computed delivery metrics, available before the LLM score."""
+
+    __tablename__ = "speech_metrics"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("sessions.id"), unique=True, nullable=False)
+    answer_count = Column(Integer, default=0)
+    total_words = Column(Integer, default=0)
+    average_words_per_answer = Column(Float, default=0)
+    words_per_minute = Column(Float, nullable=True)
+    filler_rate = Column(Float, default=0)
+    hedge_rate = Column(Float, default=0)
+    rambling_instances = Column(Integer, default=0)
+    talk_time_ratio = Column(Float, default=0)
+    details = Column(JSON, default=dict)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    session = relationship("Session", back_populates="speech_metrics")
+
 
 class AnswerScore(Base):
     __tablename__ = "answer_scores"
 
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False)
+    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False, index=True)
     question = Column(Text, nullable=False)
     answer_summary = Column(Text, nullable=False)
     term_accuracy = Column(Float, default=0)
@@ -84,3 +133,42 @@ class AnswerScore(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
     session = relationship("Session", back_populates="answer_scores")
+
+
+class SearchDocument(Base):
+    __tablename__ = "search_documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String, nullable=False)
+    source_id = Column(Integer, nullable=False)
+    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True, index=True)
+    role = Column(String, nullable=True)
+    position = Column(Integer, default=0)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (Index("ix_search_documents_source", "kind", "source_id"),)
+
+
+class ModelCall(Base):
+    """One LLM attempt made for scoring or extraction, including escalations."""
+
+    __tablename__ = "model_calls"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True, index=True)
+    attempt = Column(Integer, default=1)
+    tier = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    latency_ms = Column(Integer, nullable=True)
+    # "ok", or why the next tier was tried (e.g. invalid_json, inconsistent_overall).
+    outcome = Column(String, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    # Prompt tokens served from the provider's prompt cache.
+    cached_tokens = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
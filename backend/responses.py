@@ -0,0 +1,72 @@
+import datetime
+import email.utils
+
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Route handlers return it directly with plain dict/list content, which
+    skips jsonable_encoder; content must already be JSON-native.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+def http_date(value: datetime.datetime) -> str:
+    # Naive datetimes in this app are UTC.
+    return email.utils.format_datetime(value.replace(tzinfo=datetime.timezone.utc, microsecond=0), usegmt=True)
+
+
+def cache_headers(etag: str, last_modified: datetime.datetime = None, cache_control: str = "private, no-cache") -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime.datetime = None) -> bool:
+    """Evaluate If-None-Match (weak comparison), falling back to If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        return _opaque(etag) in {_opaque(t) for t in if_none_match.split(",")}
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=datetime.timezone.utc)
+        return last_modified.replace(tzinfo=datetime.timezone.utc, microsecond=0) <= since
+    return False
+
+
+def matches_if_match(request: Request, etag: str) -> bool:
+    """Evaluate If-Match for a write; True when absent, "*" or listing `etag`.
+
+    Deviates from RFC 9110, which requires strong comparison here: the app's
+    validators are weak because GZipMiddleware serves different bytes under
+    one tag. They still identify an exact resource revision, which is all a
+    lost-update check needs, so opaque tags are compared as for If-None-Match.
+    """
+    if_match = request.headers.get("if-match")
+    if not if_match or if_match.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(t) for t in if_match.split(",")}
+
+
+def not_modified(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,167 @@
+import csv
+import datetime
+import io
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, select
+
+from database import SessionLocal
+from models import Session, Product, Score, AnswerScore, User
+from auth import get_current_user
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+EXPORT_BATCH_SIZE = 1000
+
+SESSION_COLUMNS = [
+    Session.id.label("session_id"),
+    Session.product_id,
+    Product.name.label("product_name"),
+    Session.personality_type,
+    Session.status,
+    Session.vapi_call_id,
+    Session.created_at,
+    Score.version.label("scoring_version"),
+    Score.term_understanding,
+    Score.description_breadth,
+    Score.conciseness,
+    Score.objection_handling,
+    Score.usp_framing,
+    Score.confidence,
+    Score.overall,
+]
+
+ANSWER_SCORE_COLUMNS = [
+    AnswerScore.id.label("answer_score_id"),
+    AnswerScore.session_id,
+    Session.product_id,
+    Session.personality_type,
+    AnswerScore.question,
+    AnswerScore.answer_summary,
+    AnswerScore.term_accuracy,
+    AnswerScore.conciseness,
+    AnswerScore.framing_quality,
+    AnswerScore.feedback,
+    AnswerScore.created_at,
+]
+
+
+class ExportFilters:
+    def __init__(
+        self,
+        start: Optional[datetime.datetime] = Query(None, description="Sessions created at or after"),
+        end: Optional[datetime.datetime] = Query(None, description="Sessions created before"),
+        product_id: Optional[int] = None,
+        personality_type: Optional[str] = None,
+    ):
+        self.start = start
+        self.end = end
+        self.product_id = product_id
+        self.personality_type = personality_type
+
+    def apply(self, stmt, user_id: int):
+        stmt = stmt.where(Session.user_id == user_id)
+        if self.start:
+            stmt = stmt.where(Session.created_at >= self.start)
+        if self.end:
+            stmt = stmt.where(Session.created_at < self.end)
+        if self.product_id is not None:
+            stmt = stmt.where(Session.product_id == self.product_id)
+        if self.personality_type:
+            stmt = stmt.where(Session.personality_type == self.personality_type)
+        return stmt
+
+
+def _serialize(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(stmt):
+    # Own DB session: the generator outlives the request's dependencies.
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for row in result.mappings():
+            yield {k: _serialize(v) for k, v in row.items()}
+    finally:
+        db.close()
+
+
+def iter_ndjson(rows):
+    buffer = []
+    for row in rows:
+        buffer.append(json.dumps(row, separators=(",", ":")))
+        if len(buffer) >= EXPORT_BATCH_SIZE:
+            yield "\n".join(buffer) + "\n"
+            buffer = []
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+
+def iter_csv(rows, fieldnames: list):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    for i, row in enumerate(rows, 1):
+        writer.writerow({k: json.dumps(v) if isinstance(v, (list, dict)) else v for k, v in row.items()})
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+    yield out.getvalue()
+
+
+def stream_export(stmt, fmt: str, name: str, fieldnames: list) -> StreamingResponse:
+    rows = iter_rows(stmt)
+    if fmt == "csv":
+        body, media_type = iter_csv(rows, fieldnames), "text/csv"
+    else:
+        body, media_type = iter_ndjson(rows), "application/x-ndjson"
+    filename = f"{name}-{datetime.datetime.utcnow():%Y%m%dT%H%M%S}.{fmt}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/sessions")
+def export_sessions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    include_transcript: bool = False,
+    filters: ExportFilters = Depends(),
+    user: User = Depends(get_current_user),
+):
+    columns = list(SESSION_COLUMNS)
+    if include_transcript:
+        columns.append(Session.transcript)
+    stmt = (
+        select(*columns)
+        .outerjoin(Product, Product.id == Session.product_id)
+        .outerjoin(Score, and_(Score.session_id == Session.id, Score.is_current.is_(True)))
+        .order_by(Session.id)
+    )
+    stmt = filters.apply(stmt, user.id)
+    fieldnames = [c.key for c in columns]
+    return stream_export(stmt, format, "sessions", fieldnames)
+
+
+@router.get("/answer-scores")
+def export_answer_scores(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: ExportFilters = Depends(),
+    user: User = Depends(get_current_user),
+):
+    stmt = (
+        select(*ANSWER_SCORE_COLUMNS)
+        .join(Session, Session.id == AnswerScore.session_id)
+        .order_by(AnswerScore.id)
+    )
+    stmt = filters.apply(stmt, user.id)
+    fieldnames = [c.key for c in ANSWER_SCORE_COLUMNS]
+    return stream_export(stmt, format, "answer-scores", fieldnames)
@@ -1,40 +1,86 @@
+import datetime
 import os
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session as DBSession
-from PyPDF2 import PdfReader
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as DBSession, load_only
 import io
 
-from database import get_db
+from database import get_db, get_async_db
+from responses import ORJSONResponse, cache_headers, is_not_modified, matches_if_match, not_modified
 from models import Product, User
 from auth import get_current_user
-from services.usps_extractor import extract_usps
+from services.usps_extractor import extract_usps, validate_section_extraction
+from services.model_routing import model_call_rows
+from services.product_sections import (
+    PRODUCT_FIELDS,
+    document_sections,
+    extract_sections,
+    merge_extractions,
+    plan_update,
+)
+from services.retention import purge_product_job
+from services.search import product_statements
+from services.state_store import get_store, run_blocking
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+PRODUCT_CACHE_TTL_SECONDS = int(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "3600"))
+
+
+def product_etag(product: Product) -> str:
+    return f'W/"product-{product.id}-v{product.version or 1}"'
+
+
+def extract_section(text: str) -> dict:
+    # Sections without USPs are normal, so they must not escalate to the strong tier.
+    return extract_usps(text, validate=validate_section_extraction)
+
+
+def product_cache_key(product_id: int, version: int) -> str:
+    # Versioned, so an update never needs to invalidate across instances.
+    return f"product:{product_id}:v{version or 1}"
+
 
 def parse_upload(file_bytes: bytes, filename: str) -> str:
     if filename.lower().endswith(".pdf"):
+        from PyPDF2 import PdfReader
+
         reader = PdfReader(io.BytesIO(file_bytes))
         return "\n".join(page.extract_text() or "" for page in reader.pages)
     return file_bytes.decode("utf-8", errors="replace")
 
 
-@router.post("/upload")
-async def upload_product(
-    name: str = Form(...),
-    file: UploadFile = File(...),
-    db: DBSession = Depends(get_db),
-    user: User = Depends(get_current_user),
-):
+def backfill_counts(db: DBSession, products: list):
+    # Rows created before the count columns existed; computed once, then stored.
+    if not products:
+        return
+    for product in products:
+        product.update_counts()
+    db.commit()
+
+
+async def read_document(file: UploadFile) -> str:
     contents = await file.read()
     if len(contents) > 10 * 1024 * 1024:
         raise HTTPException(status_code=400, detail="File too large (max 10MB)")
 
-    raw_text = parse_upload(contents, file.filename)
+    raw_text = await run_in_threadpool(parse_upload, contents, file.filename)
     if len(raw_text.strip()) < 50:
         raise HTTPException(status_code=400, detail="Document too short to extract USPs from")
+    return raw_text
 
-    extracted = extract_usps(raw_text)
+
+@router.post("/upload")
+async def upload_product(
+    name: str = Form(...),
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user),
+):
+    raw_text = await read_document(file)
+    extracted = await run_in_threadpool(extract_usps, raw_text)
 
     product = Product(
         user_id=user.id,
@@ -44,16 +90,21 @@ async def upload_product(
         key_terms=extracted.get("key_terms", []),
         common_objections=extracted.get("common_objections", []),
         client_frames=extracted.get("client_frames", {}),
+        sections=document_sections(raw_text),
     )
+    product.update_counts()
     db.add(product)
-    db.commit()
-    db.refresh(product)
+    await db.flush()
+    db.add_all(model_call_rows("extraction", extracted, product_id=product.id))
+    for stmt in product_statements(product):
+        await db.execute(stmt)
+    await db.commit()
     return {
         "id": product.id,
         "name": product.name,
-        "usps_count": len(product.extracted_usps),
-        "terms_count": len(product.key_terms),
-        "objections_count": len(product.common_objections),
+        "usps_count": product.usps_count,
+        "terms_count": product.terms_count,
+        "objections_count": product.objections_count,
     }
 
 
@@ -62,48 +113,168 @@ def list_products(
     db: DBSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    products = db.query(Product).filter(Product.user_id == user.id).order_by(Product.created_at.desc()).all()
+    products = (
+        db.query(Product)
+        .options(load_only(Product.id, Product.name, Product.usps_count, Product.terms_count, Product.created_at))
+        .filter(Product.user_id == user.id, Product.deleted_at.is_(None))
+        .order_by(Product.created_at.desc())
+        .all()
+    )
+    backfill_counts(db, [p for p in products if p.usps_count is None or p.terms_count is None])
     return [
         {
             "id": p.id,
             "name": p.name,
-            "usps_count": len(p.extracted_usps or []),
-            "terms_count": len(p.key_terms or []),
+            "usps_count": p.usps_count,
+            "terms_count": p.terms_count,
             "created_at": p.created_at.isoformat(),
         }
         for p in products
     ]
 
 
-@router.get("/{product_id}")
+@router.get("/{product_id}", response_class=ORJSONResponse)
 def get_product(
     product_id: int,
+    request: Request,
     db: DBSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    product = db.query(Product).filter(Product.id == product_id, Product.user_id == user.id).first()
+    # Validate against version columns only; the JSON columns load on a miss.
+    product = (
+        db.query(Product)
+        .options(load_only(Product.id, Product.version, Product.created_at, Product.updated_at))
+        .filter(Product.id == product_id, Product.user_id == user.id, Product.deleted_at.is_(None))
+        .first()
+    )
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+
+    headers = cache_headers(
+        product_etag(product),
+        product.updated_at or product.created_at,
+    )
+    if is_not_modified(request, headers["ETag"], product.updated_at or product.created_at):
+        return not_modified(headers)
+
+    store = get_store()
+    cache_key = product_cache_key(product.id, product.version)
+    payload = store.get(cache_key)
+    if payload is None:
+        content = (
+            db.query(Product.name, Product.extracted_usps, Product.key_terms, Product.common_objections, Product.client_frames)
+            .filter(Product.id == product.id)
+            .one()
+        )
+        payload = {
+            "id": product.id,
+            "name": content.name,
+            "extracted_usps": content.extracted_usps,
+            "key_terms": content.key_terms,
+            "common_objections": content.common_objections,
+            "client_frames": content.client_frames,
+            "created_at": product.created_at.isoformat(),
+        }
+        store.set(cache_key, payload, ttl=PRODUCT_CACHE_TTL_SECONDS)
+    return ORJSONResponse(payload, headers=headers)
+
+
+@router.put("/{product_id}/document")
+async def update_document(
+    product_id: int,
+    request: Request,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user),
+):
+    product = (
+        await db.execute(
+            select(Product).where(Product.id == product_id, Product.user_id == user.id, Product.deleted_at.is_(None))
+        )
+    ).scalars().first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    # Same validator GET /products/{id} hands out, so stale editors don't overwrite newer revisions.
+    if not matches_if_match(request, product_etag(product)):
+        raise HTTPException(status_code=412, detail="Product was modified; reload and try again")
+
+    raw_text = await read_document(file)
+    old_sections = product.sections or document_sections(product.raw_text or "")
+    plan = plan_update(old_sections, product.raw_text or "", raw_text)
+    if not plan["full"] and not plan["added"] and not plan["removed"]:
+        return {"id": product.id, "version": product.version, "unchanged": True}
+
+    if plan["full"]:
+        results = [await run_in_threadpool(extract_usps, raw_text)]
+        fields = {kind: results[0].get(kind, []) for kind in PRODUCT_FIELDS}
+        fields["client_frames"] = results[0].get("client_frames", {})
+        sections = document_sections(raw_text)
+    else:
+        results = await run_in_threadpool(extract_sections, extract_section, [plan["texts"][i] for i in plan["added"]])
+        current = {kind: getattr(product, column) for kind, column in PRODUCT_FIELDS.items()}
+        current["client_frames"] = product.client_frames
+        fields, sections = merge_extractions(current, plan, old_sections, results)
+
+    # Re-check the validator in the write itself: extraction takes seconds, and a
+    # concurrent update that committed meanwhile must fail here rather than be overwritten.
+    expected = product.version or 1
+    claimed = await db.execute(
+        update(Product)
+        .where(Product.id == product.id, func.coalesce(Product.version, 1) == expected)
+        .values(version=expected + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if claimed.rowcount != 1:
+        await db.rollback()
+        raise HTTPException(status_code=412, detail="Product was modified; reload and try again")
+
+    for result in results:
+        db.add_all(model_call_rows("extraction", result, product_id=product.id))
+    for kind, column in PRODUCT_FIELDS.items():
+        setattr(product, column, fields[kind])
+    product.client_frames = fields["client_frames"]
+    product.sections = sections
+    product.raw_text = raw_text
+    product.update_counts()
+    # The version drives the product ETag and cache keys; search rows are rebuilt from the merged items.
+    await run_blocking(get_store().delete, product_cache_key(product.id, expected))
+    product.version = expected + 1
+    product.updated_at = datetime.datetime.utcnow()
+    for stmt in product_statements(product):
+        await db.execute(stmt)
+    await db.commit()
     return {
         "id": product.id,
-        "name": product.name,
-        "extracted_usps": product.extracted_usps,
-        "key_terms": product.key_terms,
-        "common_objections": product.common_objections,
-        "client_frames": product.client_frames,
-        "created_at": product.created_at.isoformat(),
+        "version": product.version,
+        "unchanged": False,
+        "full_reextraction": plan["full"],
+        "sections_total": len(plan["texts"]),
+        "sections_extracted": len(plan["texts"]) if plan["full"] else len(plan["added"]),
+        "sections_removed": len(plan["removed"]),
+        "usps_count": product.usps_count,
+        "terms_count": product.terms_count,
+        "objections_count": product.objections_count,
     }
 
 
-@router.delete("/{product_id}")
+@router.delete("/{product_id}", status_code=202)
 def delete_product(
     product_id: int,
+    background_tasks: BackgroundTasks,
     db: DBSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    product = db.query(Product).filter(Product.id == product_id, Product.user_id == user.id).first()
+    product = (
+        db.query(Product)
+        .options(load_only(Product.id, Product.version))
+        .filter(Product.id == product_id, Product.user_id == user.id, Product.deleted_at.is_(None))
+        .first()
+    )
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    db.delete(product)
+    # Hide it now; its sessions and scores are removed in batches after the response.
+    product.deleted_at = datetime.datetime.utcnow()
+    get_store().delete(product_cache_key(product.id, product.version))
     db.commit()
+    background_tasks.add_task(purge_product_job, product_id)
     return {"detail": "Product deleted"}
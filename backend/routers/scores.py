@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session as DBSession
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, load_only
 
-from database import get_db
+from database import get_async_db
 from models import Session, Score, User
 from auth import get_current_user
 
@@ -10,17 +11,22 @@ router = APIRouter(prefix="/scores", tags=["scores"])
 
 
 @router.get("/dashboard")
-def get_dashboard(
-    db: DBSession = Depends(get_db),
+async def get_dashboard(
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user),
 ):
     sessions = (
-        db.query(Session, Score)
-        .join(Score, Score.session_id == Session.id)
-        .filter(Session.user_id == user.id, Session.status == "completed")
-        .order_by(Session.created_at.desc())
-        .all()
-    )
+        await db.execute(
+            select(Session, Score)
+            .options(
+                load_only(Session.id, Session.personality_type, Session.created_at),
+                defer(Score.detailed_feedback),
+            )
+            .join(Score, Score.session_id == Session.id)
+            .where(Session.user_id == user.id, Session.status == "completed", Score.is_current.is_(True))
+            .order_by(Session.created_at.desc())
+        )
+    ).all()
 
     if not sessions:
         return {
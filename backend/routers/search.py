@@ -0,0 +1,25 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session as DBSession
+
+from database import get_db
+from models import User
+from auth import get_current_user
+from services.search import search_documents
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+SEARCH_KINDS = ("transcript", "feedback", "usp", "term")
+
+
+@router.get("/")
+def search(
+    q: str = Query(..., min_length=1),
+    kind: Optional[str] = Query(None, pattern=f"^({'|'.join(SEARCH_KINDS)})$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: DBSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    return search_documents(db, user.id, q, kind=kind, limit=limit, offset=offset)
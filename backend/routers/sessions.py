@@ -1,16 +1,27 @@
+import asyncio
+import hashlib
+import json
 import os
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlalchemy.orm import Session as DBSession
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as DBSession, load_only
 
-from database import get_db
-from models import Session, Product, Score, AnswerScore, User
+from database import SessionLocal, get_db, get_async_db
+from responses import ORJSONResponse, cache_headers, is_not_modified, not_modified
+from models import Session, Product, Score, AnswerScore, SpeechMetrics, User
 from auth import get_current_user
+from services.live_calls import live_calls
+from services.state_store import get_store, run_blocking
 from services.personality import (
     get_personality,
     get_all_personalities,
     build_system_prompt,
     PERSONALITIES,
+    PROMPT_VERSION,
 )
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
@@ -32,44 +43,73 @@ class CreateSessionRequest(BaseModel):
     personality_type: str
 
 
-@router.get("/personalities")
-def list_personalities():
-    return get_all_personalities()
+MAX_BATCH_SESSIONS = int(os.getenv("MAX_BATCH_SESSIONS", "200"))
 
 
-@router.post("/")
-def create_session(
-    req: CreateSessionRequest,
-    db: DBSession = Depends(get_db),
-    user: User = Depends(get_current_user),
-):
-    product = db.query(Product).filter(Product.id == req.product_id, Product.user_id == user.id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+class SessionAssignment(BaseModel):
+    # Sessions belong to the caller: every session endpoint is scoped to its owner, and
+    # there is no team model yet to let one user create drills for another.
+    model_config = ConfigDict(extra="forbid")
 
-    if req.personality_type not in PERSONALITIES:
-        raise HTTPException(status_code=400, detail=f"Invalid personality type. Choose from: {list(PERSONALITIES.keys())}")
+    personality_type: str
+
+
+class BatchCreateSessionsRequest(BaseModel):
+    product_id: int
+    sessions: List[SessionAssignment] = Field(min_length=1, max_length=MAX_BATCH_SESSIONS)
+
+
+PERSONALITIES_HASH = hashlib.sha1(json.dumps(get_all_personalities(), sort_keys=True).encode()).hexdigest()[:16]
+PERSONALITIES_ETAG = f'"{PERSONALITIES_HASH}"'
+PERSONALITIES_CACHE_CONTROL = "public, max-age=86400"
 
-    session = Session(
-        user_id=user.id,
-        product_id=req.product_id,
-        personality_type=req.personality_type,
-        status="pending",
-    )
-    db.add(session)
-    db.commit()
-    db.refresh(session)
 
-    personality = get_personality(req.personality_type)
-    product_data = {
+@router.get("/personalities")
+def list_personalities(request: Request):
+    headers = cache_headers(PERSONALITIES_ETAG, cache_control=PERSONALITIES_CACHE_CONTROL)
+    if is_not_modified(request, PERSONALITIES_ETAG):
+        return not_modified(headers)
+    return ORJSONResponse(get_all_personalities(), headers=headers)
+
+
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "86400"))
+PROMPT_COLUMNS = ["extracted_usps", "key_terms", "common_objections", "client_frames"]
+
+
+def product_prompt_data(product: Product) -> dict:
+    return {
         "extracted_usps": product.extracted_usps or [],
         "key_terms": product.key_terms or [],
         "common_objections": product.common_objections or [],
         "client_frames": product.client_frames or {},
     }
-    system_prompt = build_system_prompt(req.personality_type, product_data)
 
-    vapi_config = {
+
+def system_prompts(db: DBSession, product: Product, personality_types) -> dict:
+    """Rendered prompt per personality, shared across instances.
+
+    Keys carry the product version and PROMPT_VERSION, so a document update
+    or a deploy that changes how prompts render starts fresh keys.
+    Only a miss loads the product's JSON columns.
+    """
+    store = get_store()
+    keys = {
+        personality_type: f"prompt:{product.id}:v{product.version or 1}:{PROMPT_VERSION}:{personality_type}"
+        for personality_type in personality_types
+    }
+    prompts = {personality_type: store.get(key) for personality_type, key in keys.items()}
+    missing = [personality_type for personality_type, prompt in prompts.items() if prompt is None]
+    if missing:
+        db.refresh(product, PROMPT_COLUMNS)
+        product_data = product_prompt_data(product)
+        for personality_type in missing:
+            prompts[personality_type] = build_system_prompt(personality_type, product_data)
+            store.set(keys[personality_type], prompts[personality_type], ttl=PROMPT_CACHE_TTL_SECONDS)
+    return prompts
+
+
+def build_vapi_config(session_id: int, personality_type: str, system_prompt: str) -> dict:
+    return {
         "model": {
             "provider": "openai",
             "model": "gpt-4o",
@@ -121,21 +161,105 @@ def create_session(
         "firstMessage": f"Hey, thanks for jumping on this call. I've got a few minutes — tell me what you've got. What is this product and why should I care?",
         "serverUrl": f"{get_webhook_base_url()}/webhook/vapi",
         "serverMessages": ["end-of-call-report", "tool-calls", "transcript", "status-update"],
-        "stopSpeakingPlan": personality["vapi_stop_speaking_plan"],
+        "stopSpeakingPlan": get_personality(personality_type)["vapi_stop_speaking_plan"],
         "endCallPhrases": ["goodbye", "end the session", "that's all"],
         "metadata": {
-            "session_id": session.id,
+            "session_id": session_id,
         },
     }
 
+
+def personality_summary(personality_type: str) -> dict:
+    personality = get_personality(personality_type)
+    return {
+        "type": personality_type,
+        "label": personality["label"],
+        "description": personality["description"],
+    }
+
+
+@router.post("/")
+def create_session(
+    req: CreateSessionRequest,
+    db: DBSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    product = (
+        db.query(Product)
+        .options(load_only(Product.id, Product.version))
+        .filter(Product.id == req.product_id, Product.user_id == user.id, Product.deleted_at.is_(None))
+        .first()
+    )
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    if req.personality_type not in PERSONALITIES:
+        raise HTTPException(status_code=400, detail=f"Invalid personality type. Choose from: {list(PERSONALITIES.keys())}")
+
+    system_prompt = system_prompts(db, product, [req.personality_type])[req.personality_type]
+    session = Session(
+        user_id=user.id,
+        product_id=req.product_id,
+        personality_type=req.personality_type,
+        status="pending",
+    )
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+
     return {
         "session_id": session.id,
-        "vapi_config": vapi_config,
-        "personality": {
-            "type": req.personality_type,
-            "label": personality["label"],
-            "description": personality["description"],
-        },
+        "vapi_config": build_vapi_config(session.id, req.personality_type, system_prompt),
+        "personality": personality_summary(req.personality_type),
+    }
+
+
+@router.post("/batch")
+def create_sessions_batch(
+    req: BatchCreateSessionsRequest,
+    db: DBSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    product = (
+        db.query(Product)
+        .options(load_only(Product.id, Product.version))
+        .filter(Product.id == req.product_id, Product.user_id == user.id, Product.deleted_at.is_(None))
+        .first()
+    )
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    invalid = sorted({a.personality_type for a in req.sessions} - PERSONALITIES.keys())
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid personality types {invalid}. Choose from: {list(PERSONALITIES.keys())}")
+
+    # One insert round trip and one commit for the whole drill.
+    sessions = [
+        Session(
+            user_id=user.id,
+            product_id=product.id,
+            personality_type=a.personality_type,
+            status="pending",
+        )
+        for a in req.sessions
+    ]
+    db.add_all(sessions)
+    db.flush()
+    rows = [(s.id, s.personality_type) for s in sessions]
+    # Prompts only vary by personality, so render each once.
+    prompts = system_prompts(db, product, {personality_type for _, personality_type in rows})
+    db.commit()
+
+    return {
+        "product_id": req.product_id,
+        "sessions": [
+            {
+                "session_id": session_id,
+                "vapi_config": build_vapi_config(session_id, personality_type, prompts[personality_type]),
+                "personality": personality_summary(personality_type),
+            }
+            for session_id, personality_type in rows
+        ],
     }
 
 
@@ -156,52 +280,160 @@ def update_call_id(
     session.vapi_call_id = req.vapi_call_id
     session.status = "active"
     db.commit()
+    live_calls.register(req.vapi_call_id, session.id, session.personality_type)
     return {"status": "updated"}
 
 
+def get_live_session(session_id: int, token: str):
+    db = SessionLocal()
+    try:
+        user = get_current_user(token=token, db=db)
+        return db.query(Session).filter(Session.id == session_id, Session.user_id == user.id).first()
+    except HTTPException:
+        return None
+    finally:
+        db.close()
+
+
+async def wait_for_disconnect(websocket: WebSocket):
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/{session_id}/live")
+async def live_coaching(websocket: WebSocket, session_id: int, token: str = ""):
+    # Browsers can't set headers on a WebSocket, so the token comes as a query param.
+    # The session is checked once here; everything pushed after comes from the shared store.
+    session = await run_in_threadpool(get_live_session, session_id, token)
+    if not session:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    if session.status == "completed":
+        await websocket.send_json({"type": "status", "status": "ended"})
+        await websocket.close()
+        return
+
+    # Subscribe before the snapshot so nothing published in between is missed.
+    subscription = await live_calls.subscribe(session.id)
+    # The client never sends anything, but reading is the only way to notice it left;
+    # otherwise a call whose end is never delivered keeps this handler open forever.
+    disconnected = asyncio.ensure_future(wait_for_disconnect(websocket))
+    try:
+        await websocket.send_json(await run_blocking(live_calls.snapshot, session.id, session.personality_type))
+        while True:
+            next_event = asyncio.ensure_future(subscription.get())
+            await asyncio.wait({next_event, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_event.done():
+                next_event.cancel()
+                return
+            event = next_event.result()
+            if event is None:
+                break
+            await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        disconnected.cancel()
+        await subscription.close()
+
+
 @router.get("/")
-def list_sessions(
-    db: DBSession = Depends(get_db),
+async def list_sessions(
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user),
 ):
-    sessions = (
-        db.query(Session)
-        .filter(Session.user_id == user.id)
-        .order_by(Session.created_at.desc())
-        .all()
-    )
-    results = []
-    for s in sessions:
-        score = db.query(Score).filter(Score.session_id == s.id).first()
-        product = db.query(Product).filter(Product.id == s.product_id).first()
-        results.append({
+    rows = (
+        await db.execute(
+            select(Session, Product.name, Score.overall)
+            .options(load_only(Session.id, Session.personality_type, Session.status, Session.created_at))
+            .outerjoin(Product, Product.id == Session.product_id)
+            .outerjoin(Score, and_(Score.session_id == Session.id, Score.is_current.is_(True)))
+            .where(Session.user_id == user.id)
+            .order_by(Session.created_at.desc())
+        )
+    ).all()
+    return [
+        {
             "id": s.id,
-            "product_name": product.name if product else "Unknown",
+            "product_name": product_name or "Unknown",
             "personality_type": s.personality_type,
             "status": s.status,
-            "overall_score": score.overall if score else None,
+            "overall_score": overall,
             "created_at": s.created_at.isoformat(),
-        })
-    return results
+        }
+        for s, product_name, overall in rows
+    ]
 
 
-@router.get("/{session_id}")
-def get_session(
+@router.get("/{session_id}", response_class=ORJSONResponse)
+async def get_session(
     session_id: int,
-    db: DBSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user),
 ):
-    session = db.query(Session).filter(Session.id == session_id, Session.user_id == user.id).first()
+    # Completed, scored sessions only change when re-scored or late answer
+    # scores arrive, so validate against those ids before loading the transcript.
+    validator = (
+        await db.execute(
+            select(
+                Session.status,
+                Session.created_at,
+                select(func.max(Score.id))
+                .where(Score.session_id == Session.id, Score.is_current.is_(True))
+                .scalar_subquery(),
+                select(func.max(Score.created_at))
+                .where(Score.session_id == Session.id, Score.is_current.is_(True))
+                .scalar_subquery(),
+                select(func.count(AnswerScore.id)).where(AnswerScore.session_id == Session.id).scalar_subquery(),
+                select(func.max(AnswerScore.created_at)).where(AnswerScore.session_id == Session.id).scalar_subquery(),
+            ).where(Session.id == session_id, Session.user_id == user.id)
+        )
+    ).first()
+    if not validator:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    status, created_at, score_id, scored_at, answer_count, answered_at = validator
+    headers = {}
+    if status == "completed" and score_id:
+        # Late answer scores change the body too, so they move Last-Modified as well as the ETag.
+        last_modified = max(filter(None, (scored_at, answered_at)), default=created_at)
+        headers = cache_headers(f'W/"session-{session_id}-s{score_id}-a{answer_count}"', last_modified)
+        if is_not_modified(request, headers["ETag"], last_modified):
+            return not_modified(headers)
+
+    session = (
+        await db.execute(select(Session).where(Session.id == session_id, Session.user_id == user.id))
+    ).scalars().first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    score = db.query(Score).filter(Score.session_id == session.id).first()
-    answer_scores = db.query(AnswerScore).filter(AnswerScore.session_id == session.id).order_by(AnswerScore.created_at).all()
-    product = db.query(Product).filter(Product.id == session.product_id).first()
+    # Falls back to a result that is still streaming in, which is never current.
+    score = (
+        await db.execute(
+            select(Score)
+            .where(Score.session_id == session.id, or_(Score.is_current.is_(True), Score.status == "scoring"))
+            .order_by(Score.is_current.desc())
+            .limit(1)
+        )
+    ).scalars().first()
+    answer_scores = (
+        await db.execute(
+            select(AnswerScore).where(AnswerScore.session_id == session.id).order_by(AnswerScore.created_at)
+        )
+    ).scalars().all()
+    product_name = (await db.execute(select(Product.name).where(Product.id == session.product_id))).scalar()
+    speech_metrics = (
+        await db.execute(select(SpeechMetrics).where(SpeechMetrics.session_id == session.id))
+    ).scalars().first()
 
-    return {
+    # Returned as a response directly to skip jsonable_encoder on the large transcript.
+    return ORJSONResponse({
         "id": session.id,
-        "product_name": product.name if product else "Unknown",
+        "product_name": product_name or "Unknown",
         "personality_type": session.personality_type,
         "status": session.status,
         "transcript": session.transcript,
@@ -215,7 +447,9 @@ def get_session(
             "confidence": score.confidence,
             "overall": score.overall,
             "detailed_feedback": score.detailed_feedback,
+            "status": score.status or "complete",
         } if score else None,
+        "speech_metrics": speech_metrics.details if speech_metrics else None,
         "answer_scores": [
             {
                 "question": a.question,
@@ -227,4 +461,4 @@ def get_session(
             }
             for a in answer_scores
         ],
-    }
+    }, headers=headers)
@@ -1,16 +1,32 @@
+import datetime
 import json
+from anyio import from_thread
 from fastapi import APIRouter, Request
-from sqlalchemy.orm import Session as DBSession
-
-from database import SessionLocal
-from models import Session, Score, AnswerScore, Product
-from services.scoring import score_full_session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+from models import Session, Score, AnswerScore, Product, SpeechMetrics
+from services.scoring import score_full_session, scoring_lease_expired_before, SCORE_DIMENSIONS, SCORING_VERSION
+from services.search import transcript_statements, answer_score_statements
+from services.live_calls import live_calls
+from services.model_routing import model_call_rows
+from services.speech_analytics import analyze_transcript, speech_metrics_values
+from services.state_store import run_blocking
+from services.transcript_buffer import transcript_buffer
 
 router = APIRouter(prefix="/webhook", tags=["webhook"])
 
 
-def get_db_session() -> DBSession:
-    return SessionLocal()
+def get_db_session() -> AsyncSession:
+    return AsyncSessionLocal()
+
+
+async def get_session_by_call_id(db: AsyncSession, call_id: str):
+    result = await db.execute(select(Session).where(Session.vapi_call_id == call_id))
+    return result.scalars().first()
 
 
 @router.post("/vapi")
@@ -20,21 +36,21 @@ async def vapi_webhook(request: Request):
     msg_type = message.get("type", "")
 
     if msg_type == "tool-calls":
-        return handle_tool_calls(message)
+        return await handle_tool_calls(message)
     elif msg_type == "end-of-call-report":
-        handle_end_of_call(message)
+        await handle_end_of_call(message)
         return {"status": "ok"}
     elif msg_type == "transcript":
-        handle_transcript(message)
+        await handle_transcript(message)
         return {"status": "ok"}
     elif msg_type == "status-update":
-        handle_status_update(message)
+        await handle_status_update(message)
         return {"status": "ok"}
 
     return {"status": "ok"}
 
 
-def handle_tool_calls(message: dict) -> dict:
+async def handle_tool_calls(message: dict) -> dict:
     tool_calls = message.get("toolCallList", [])
     results = []
 
@@ -46,7 +62,7 @@ def handle_tool_calls(message: dict) -> dict:
         tool_call_id = tool_call.get("id", "")
 
         if fn_name == "score_response":
-            save_answer_score(message, arguments)
+            await save_answer_score(message, arguments)
             results.append({
                 "name": fn_name,
                 "toolCallId": tool_call_id,
@@ -62,14 +78,13 @@ def handle_tool_calls(message: dict) -> dict:
     return {"results": results}
 
 
-def save_answer_score(message: dict, arguments: dict):
+async def save_answer_score(message: dict, arguments: dict):
     call_id = message.get("call", {}).get("id")
     if not call_id:
         return
 
-    db = get_db_session()
-    try:
-        session = db.query(Session).filter(Session.vapi_call_id == call_id).first()
+    async with get_db_session() as db:
+        session = await get_session_by_call_id(db, call_id)
         if not session:
             return
 
@@ -83,66 +98,114 @@ def save_answer_score(message: dict, arguments: dict):
             feedback=arguments.get("feedback", ""),
         )
         db.add(answer_score)
-        db.commit()
-    finally:
-        db.close()
-
-
-def handle_transcript(message: dict):
+        await db.flush()
+        for stmt in answer_score_statements(session, answer_score):
+            await db.execute(stmt)
+        await db.commit()
+
+    # Registering here too picks calls back up after a restart mid-call.
+    await run_blocking(live_calls.register, call_id, session.id, session.personality_type)
+    await live_calls.on_answer_score(call_id, {
+        "question": answer_score.question,
+        "answer_summary": answer_score.answer_summary,
+        "term_accuracy": answer_score.term_accuracy,
+        "conciseness": answer_score.conciseness,
+        "framing_quality": answer_score.framing_quality,
+        "feedback": answer_score.feedback,
+    })
+
+
+async def handle_transcript(message: dict):
     call_id = message.get("call", {}).get("id")
-    transcript = message.get("artifact", {}).get("transcript", "")
+    transcript = message.get("transcript") or message.get("artifact", {}).get("transcript", "")
     if not call_id or not transcript:
         return
 
-    db = get_db_session()
-    try:
-        session = db.query(Session).filter(Session.vapi_call_id == call_id).first()
-        if session:
-            current = session.transcript or []
-            current.append({"role": message.get("role", "unknown"), "content": transcript})
-            session.transcript = current
-            db.commit()
-    finally:
-        db.close()
+    role = message.get("role", "unknown")
+    is_final = message.get("transcriptType", "final") == "final"
+    await live_calls.on_transcript(call_id, role, transcript, is_final)
+    if await run_blocking(transcript_buffer.add, call_id, role, transcript, is_final):
+        await flush_transcript(call_id)
+
+    for idle_call_id in await run_blocking(transcript_buffer.idle_calls):
+        await flush_transcript(idle_call_id, call_ended=True)
+        await live_calls.end(idle_call_id)
 
 
-def handle_status_update(message: dict):
+async def flush_transcript(call_id: str, call_ended: bool = False):
+    # The lock keeps appends for one call ordered across concurrent deliveries, on any instance.
+    async with transcript_buffer.lock(call_id):
+        segments = await run_blocking(transcript_buffer.take, call_id, include_partials=call_ended)
+        if segments:
+            async with get_db_session() as db:
+                session = await get_session_by_call_id(db, call_id)
+                if session:
+                    session.transcript = (session.transcript or []) + segments
+                    await db.commit()
+    if call_ended:
+        await run_blocking(transcript_buffer.discard, call_id)
+
+
+async def handle_status_update(message: dict):
     call_id = message.get("call", {}).get("id")
     status = message.get("status")
     if not call_id or not status:
         return
 
-    db = get_db_session()
-    try:
-        session = db.query(Session).filter(Session.vapi_call_id == call_id).first()
+    if status == "ended":
+        await flush_transcript(call_id, call_ended=True)
+        await live_calls.end(call_id)
+    elif status == "in-progress":
+        await live_calls.on_status(call_id, "active")
+
+    async with get_db_session() as db:
+        session = await get_session_by_call_id(db, call_id)
         if session:
             if status == "in-progress":
                 session.status = "active"
             elif status == "ended":
                 session.status = "completed"
-            db.commit()
-    finally:
-        db.close()
+            await db.commit()
+
 
+async def save_speech_metrics(db: AsyncSession, session: Session, transcript: list):
+    values = speech_metrics_values(analyze_transcript(transcript, session.personality_type))
+    metrics = (
+        await db.execute(select(SpeechMetrics).where(SpeechMetrics.session_id == session.id))
+    ).scalars().first()
+    if metrics is None:
+        db.add(SpeechMetrics(session_id=session.id, **values))
+    else:
+        for key, value in values.items():
+            setattr(metrics, key, value)
 
-def handle_end_of_call(message: dict):
+
+async def handle_end_of_call(message: dict):
     call_id = message.get("call", {}).get("id")
     if not call_id:
         return
 
-    db = get_db_session()
-    try:
-        session = db.query(Session).filter(Session.vapi_call_id == call_id).first()
-        if not session:
-            return
-
-        messages = message.get("artifact", {}).get("messages", [])
-        if messages:
-            session.transcript = messages
-        session.status = "completed"
-        db.commit()
-
-        product = db.query(Product).filter(Product.id == session.product_id).first()
+    await live_calls.end(call_id)
+
+    async with get_db_session() as db:
+        # The report's messages replace anything still buffered from live events. Under the
+        # flush lock, so a flush that read the row earlier can't write it back over the report.
+        async with transcript_buffer.lock(call_id):
+            await run_blocking(transcript_buffer.discard, call_id)
+            session = await get_session_by_call_id(db, call_id)
+            if not session:
+                return
+
+            messages = message.get("artifact", {}).get("messages", [])
+            if messages:
+                session.transcript = messages
+                for stmt in transcript_statements(session, messages):
+                    await db.execute(stmt)
+            session.status = "completed"
+            await save_speech_metrics(db, session, session.transcript or [])
+            await db.commit()
+
+        product = await db.get(Product, session.product_id)
         if not product:
             return
 
@@ -151,29 +214,114 @@ def handle_end_of_call(message: dict):
             "key_terms": product.key_terms or [],
         }
 
-        scores_result = score_full_session(messages, product_data, session.personality_type)
-
-        existing_score = db.query(Score).filter(Score.session_id == session.id).first()
-        if existing_score:
+        score = (
+            await db.execute(
+                select(Score).where(Score.session_id == session.id, Score.version == SCORING_VERSION)
+            )
+        ).scalars().first()
+        claimed_at = datetime.datetime.utcnow()
+        if score is None:
+            # Created up front so streamed results have a row to fill in.
+            score = Score(
+                session_id=session.id, version=SCORING_VERSION, is_current=False, status="scoring", claimed_at=claimed_at
+            )
+            db.add(score)
+            try:
+                await db.commit()
+            except IntegrityError:
+                # A redelivery of this report created the row first and is scoring it.
+                await db.rollback()
+                return
+        elif score.status != "scoring":
             return
-
-        score = Score(
-            session_id=session.id,
-            term_understanding=scores_result.get("term_understanding", 0),
-            description_breadth=scores_result.get("description_breadth", 0),
-            conciseness=scores_result.get("conciseness", 0),
-            objection_handling=scores_result.get("objection_handling", 0),
-            usp_framing=scores_result.get("usp_framing", 0),
-            confidence=scores_result.get("confidence", 0),
-            overall=scores_result.get("overall", 0),
-            detailed_feedback={
-                "per_answer_feedback": scores_result.get("per_answer_feedback", []),
-                "strengths": scores_result.get("strengths", []),
-                "improvements": scores_result.get("improvements", []),
-                "rambling_instances": scores_result.get("rambling_instances", 0),
-            },
+        else:
+            # Another delivery still owns this row unless its lease has run out.
+            claimed = await db.execute(
+                update(Score)
+                .where(
+                    Score.id == score.id,
+                    Score.status == "scoring",
+                    or_(Score.claimed_at.is_(None), Score.claimed_at < scoring_lease_expired_before()),
+                )
+                .values(claimed_at=claimed_at)
+            )
+            await db.commit()
+            if claimed.rowcount != 1:
+                return
+            score.claimed_at = claimed_at
+        for key in SCORE_DIMENSIONS + ["overall"]:
+            setattr(score, key, None)
+        score.detailed_feedback = {}
+        await db.commit()
+
+        score_id = score.id
+        try:
+            scores_result = await run_in_threadpool(
+                score_full_session,
+                messages,
+                product_data,
+                session.personality_type,
+                lambda event: from_thread.run(save_score_progress, score_id, claimed_at, event),
+            )
+        except Exception:
+            # Don't leave a half-filled scorecard behind; a redelivered report starts over.
+            await db.execute(delete(Score).where(Score.id == score_id, Score.claimed_at == claimed_at))
+            await db.commit()
+            raise
+
+        # Conditional on the claim, so a stalled run whose lease was taken over writes nothing.
+        completed = await db.execute(
+            update(Score)
+            .where(Score.id == score_id, Score.claimed_at == claimed_at)
+            .values(
+                **{key: scores_result.get(key, 0) for key in SCORE_DIMENSIONS + ["overall"]},
+                detailed_feedback={
+                    "per_answer_feedback": scores_result.get("per_answer_feedback", []),
+                    "strengths": scores_result.get("strengths", []),
+                    "improvements": scores_result.get("improvements", []),
+                    "rambling_instances": scores_result.get("rambling_instances", 0),
+                },
+                status="complete",
+                claimed_at=None,
+                is_current=True,
+            )
+            .execution_options(synchronize_session=False)
         )
-        db.add(score)
-        db.commit()
-    finally:
-        db.close()
+        if completed.rowcount != 1:
+            await db.rollback()
+            return
+        # Exactly one current row per session, as rescore --promote leaves it.
+        await db.execute(
+            update(Score)
+            .where(Score.session_id == session.id, Score.id != score_id)
+            .values(is_current=False)
+            .execution_options(synchronize_session=False)
+        )
+        db.add_all(model_call_rows("scoring", scores_result, session_id=session.id))
+        await db.commit()
+
+
+FEEDBACK_FIELDS = ("per_answer_feedback", "strengths", "improvements", "rambling_instances")
+
+
+async def save_score_progress(score_id: int, claimed_at: datetime.datetime, event: tuple):
+    """Persist one streamed scoring event so the scorecard can show it right away."""
+    kind, key, value = event
+    async with get_db_session() as db:
+        score = await db.get(Score, score_id)
+        if score is None or score.claimed_at != claimed_at:
+            return
+        feedback = dict(score.detailed_feedback or {})
+        if kind == "reset":
+            for dimension in SCORE_DIMENSIONS + ["overall"]:
+                setattr(score, dimension, None)
+            feedback = {}
+        elif kind == "item" and key == "per_answer_feedback":
+            feedback[key] = feedback.get(key, []) + [value]
+        elif kind == "field" and key in SCORE_DIMENSIONS + ["overall"]:
+            if isinstance(value, (int, float)):
+                setattr(score, key, value)
+        elif kind == "field" and key in FEEDBACK_FIELDS:
+            feedback[key] = value
+        score.detailed_feedback = feedback
+        await db.commit()
@@ -0,0 +1,92 @@
+import argparse
+import datetime
+import os
+
+from sqlalchemy import Text, select, type_coerce, update
+from sqlalchemy.orm import Session as DBSession
+
+from column_types import COMPRESSED_PREFIX, compress_json
+from database import SessionLocal
+from models import Session, Product
+
+TRANSCRIPT_ARCHIVE_DAYS = int(os.getenv("TRANSCRIPT_ARCHIVE_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = 500
+
+
+def archive_old_transcripts(
+    db: DBSession,
+    older_than_days: int = TRANSCRIPT_ARCHIVE_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+) -> int:
+    """Compress transcripts of completed sessions older than the cutoff.
+
+    Works in id-ordered batches with a commit per batch so no single
+    transaction holds the sessions table for long. Returns rows archived.
+    """
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=older_than_days)
+    archived = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Session.id, Session.transcript)
+            .where(
+                Session.id > last_id,
+                Session.status == "completed",
+                Session.archived_at.is_(None),
+                Session.created_at < cutoff,
+            )
+            .order_by(Session.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return archived
+
+        now = datetime.datetime.utcnow()
+        for session_id, transcript in rows:
+            db.execute(
+                update(Session)
+                .where(Session.id == session_id)
+                .values(transcript=compress_json(transcript or []), archived_at=now)
+            )
+        db.commit()
+        archived += len(rows)
+        last_id = rows[-1].id
+
+
+def compress_product_text(db: DBSession, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Rewrite raw_text stored before compression was introduced."""
+    compressed = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Product.id, Product.raw_text)
+            .where(
+                Product.id > last_id,
+                type_coerce(Product.raw_text, Text).notlike(f"{COMPRESSED_PREFIX}%"),
+            )
+            .order_by(Product.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return compressed
+
+        for product_id, raw_text in rows:
+            db.execute(update(Product).where(Product.id == product_id).values(raw_text=raw_text))
+        db.commit()
+        compressed += len(rows)
+        last_id = rows[-1].id
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress old transcripts and legacy product text.")
+    parser.add_argument("--days", type=int, default=TRANSCRIPT_ARCHIVE_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        sessions = archive_old_transcripts(db, args.days, args.batch_size)
+        products = compress_product_text(db, args.batch_size)
+    finally:
+        db.close()
+    print(f"Archived {sessions} transcripts, compressed {products} product documents")
@@ -0,0 +1,175 @@
+import os
+
+from services.speech_analytics import REP_ROLES, PROSPECT_ROLES, word_count, word_threshold
+from services.state_store import StateStore, Subscription, get_store, run_blocking
+
+# Bounds how long state for a call whose end was never delivered lingers.
+LIVE_CALL_TTL_SECONDS = float(os.getenv("LIVE_CALL_TTL_SECONDS", "14400"))
+
+
+class LiveCallState:
+    """Running coaching metrics for one active call.
+
+    Handlers return the event to push to the coaching socket, or None.
+    """
+
+    def __init__(self, session_id: int, personality_type: str):
+        self.session_id = session_id
+        self.status = "active"
+        self.threshold = word_threshold(personality_type)
+        self.total_words = 0
+        self.answers = 0
+        self.rambling_count = 0
+        self.answer_final_words = 0
+        self.answer_partial_words = 0
+        self.answer_rambled = False
+        self.answer_scores = []
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LiveCallState":
+        state = cls.__new__(cls)
+        state.__dict__.update(data)
+        return state
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    @property
+    def current_answer_words(self) -> int:
+        return self.answer_final_words + self.answer_partial_words
+
+    def snapshot(self) -> dict:
+        return {
+            "type": "snapshot",
+            "session_id": self.session_id,
+            "status": self.status,
+            "metrics": self.metrics(),
+            "answer_scores": self.answer_scores,
+        }
+
+    def metrics(self) -> dict:
+        return {
+            "current_answer_words": self.current_answer_words,
+            "word_threshold": self.threshold,
+            "total_words": self.total_words,
+            "answers": self.answers,
+            "rambling_count": self.rambling_count,
+        }
+
+    def on_transcript(self, role: str, text: str, is_final: bool):
+        if role in PROSPECT_ROLES and is_final:
+            self.answer_final_words = self.answer_partial_words = 0
+            self.answer_rambled = False
+            return None
+        if role not in REP_ROLES:
+            return None
+
+        words = word_count(text)
+        if self.current_answer_words == 0 and words:
+            self.answers += 1
+        if is_final:
+            self.answer_final_words += words
+            self.answer_partial_words = 0
+            self.total_words += words
+        else:
+            # Partials are cumulative within an utterance, so replace rather than add.
+            self.answer_partial_words = words
+        if not self.answer_rambled and self.current_answer_words > self.threshold:
+            self.answer_rambled = True
+            self.rambling_count += 1
+        return {"type": "metrics", "metrics": self.metrics()}
+
+    def on_answer_score(self, answer_score: dict):
+        self.answer_scores.append(answer_score)
+        return {"type": "answer_score", "answer_score": answer_score}
+
+    def on_status(self, status: str):
+        self.status = status
+        return {"type": "status", "status": status}
+
+
+def _call_key(call_id: str) -> str:
+    return f"live:call:{call_id}"
+
+
+def _state_key(session_id: int) -> str:
+    return f"live:session:{session_id}"
+
+
+def _channel(session_id: int) -> str:
+    return f"live:events:{session_id}"
+
+
+class LiveCalls:
+    """Live call state in the shared store, keyed by session and looked up by Vapi call id.
+
+    Events go out on a per-session channel, so the coaching socket can be
+    connected to a different instance than the one receiving the webhooks.
+    A None message ends the stream. register() and snapshot() are blocking
+    store calls; the other methods are safe on the event loop.
+    """
+
+    def __init__(self, store: StateStore = None):
+        self._store = store
+
+    @property
+    def store(self) -> StateStore:
+        return self._store or get_store()
+
+    def register(self, call_id: str, session_id: int, personality_type: str):
+        store = self.store
+        store.set(_call_key(call_id), session_id, ttl=LIVE_CALL_TTL_SECONDS)
+        store.add(_state_key(session_id), LiveCallState(session_id, personality_type).to_dict(), ttl=LIVE_CALL_TTL_SECONDS)
+
+    def snapshot(self, session_id: int, personality_type: str) -> dict:
+        data = self.store.get(_state_key(session_id))
+        state = LiveCallState.from_dict(data) if data else LiveCallState(session_id, personality_type)
+        return state.snapshot()
+
+    def _apply(self, session_id: int, apply):
+        store = self.store
+        key = _state_key(session_id)
+        data = store.get(key)
+        if data is None:
+            return
+        state = LiveCallState.from_dict(data)
+        event = apply(state)
+        store.set(key, state.to_dict(), ttl=LIVE_CALL_TTL_SECONDS)
+        if event is not None:
+            store.publish(_channel(session_id), event)
+
+    async def _update(self, call_id: str, apply):
+        store = self.store
+        session_id = await run_blocking(store.get, _call_key(call_id), store=store)
+        if session_id is None:
+            return
+        # Read-modify-write across instances; publishing inside keeps events in order.
+        async with store.lock(_state_key(session_id)):
+            await run_blocking(self._apply, session_id, apply, store=store)
+
+    async def on_transcript(self, call_id: str, role: str, text: str, is_final: bool):
+        await self._update(call_id, lambda state: state.on_transcript(role, text, is_final))
+
+    async def on_answer_score(self, call_id: str, answer_score: dict):
+        await self._update(call_id, lambda state: state.on_answer_score(answer_score))
+
+    async def on_status(self, call_id: str, status: str):
+        await self._update(call_id, lambda state: state.on_status(status))
+
+    def _close(self, call_id: str, session_id: int):
+        self.store.delete(_call_key(call_id), _state_key(session_id))
+        self.store.publish(_channel(session_id), None)
+
+    async def end(self, call_id: str):
+        store = self.store
+        session_id = await run_blocking(store.get, _call_key(call_id), store=store)
+        if session_id is None:
+            return
+        await self.on_status(call_id, "ended")
+        await run_blocking(self._close, call_id, session_id, store=store)
+
+    async def subscribe(self, session_id: int) -> Subscription:
+        return await self.store.subscribe(_channel(session_id))
+
+
+live_calls = LiveCalls()
@@ -0,0 +1,94 @@
+import json
+import os
+import time
+
+from models import ModelCall
+
+FAST_TIER = "fast"
+STRONG_TIER = "strong"
+# Key under which scoring/extraction results carry how they were produced.
+ROUTING_KEY = "routing"
+
+FAST_MODEL = os.getenv("FAST_MODEL", "gpt-4o-mini")
+
+
+def route_tiers(size: int, fast_max_size: int, strong_model: str, fast_model: str = FAST_MODEL) -> list:
+    """Models to try in order: small inputs start on the fast tier, everything can escalate."""
+    if fast_model and fast_model != strong_model and size <= fast_max_size:
+        return [(FAST_TIER, fast_model), (STRONG_TIER, strong_model)]
+    return [(STRONG_TIER, strong_model)]
+
+
+def usage_counts(usage) -> dict:
+    """Token counts from an OpenAI usage object, including cache hits."""
+    if usage is None:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+    }
+
+
+def complete_json(create, tiers: list, validate) -> dict:
+    """Run `create(model)` per tier until its text parses and passes `validate`.
+
+    `create` returns the response text and its usage object (or None).
+    `validate(result)` returns None when the result is usable, otherwise a short
+    reason. The last tier's answer is returned even if it fails validation, as
+    before routing existed; only its invalid JSON raises. The result carries the
+    attempts under ROUTING_KEY.
+    """
+    attempts = []
+    for position, (tier, model) in enumerate(tiers):
+        last = position == len(tiers) - 1
+        started = time.perf_counter()
+        content, usage = create(model)
+        attempt = {
+            "tier": tier,
+            "model": model,
+            "latency_ms": round((time.perf_counter() - started) * 1000),
+            **usage_counts(usage),
+        }
+        attempts.append(attempt)
+        try:
+            result = json.loads(content)
+        except json.JSONDecodeError:
+            if last:
+                raise
+            attempt["outcome"] = "invalid_json"
+            continue
+        problem = validate(result) if isinstance(result, dict) else "not_an_object"
+        attempt["outcome"] = problem or "ok"
+        if problem is None or last:
+            result[ROUTING_KEY] = {
+                "tier": tier,
+                "model": model,
+                "latency_ms": sum(a["latency_ms"] for a in attempts),
+                "attempts": attempts,
+            }
+            return result
+
+
+def model_call_rows(kind: str, result: dict, session_id: int = None, product_id: int = None) -> list:
+    """ModelCall rows for one routed request; pops the routing info off the result."""
+    routing = result.pop(ROUTING_KEY, None)
+    if not routing:
+        return []
+    return [
+        ModelCall(
+            kind=kind,
+            session_id=session_id,
+            product_id=product_id,
+            attempt=position,
+            tier=attempt["tier"],
+            model=attempt["model"],
+            latency_ms=attempt["latency_ms"],
+            outcome=attempt["outcome"],
+            prompt_tokens=attempt.get("prompt_tokens"),
+            completion_tokens=attempt.get("completion_tokens"),
+            cached_tokens=attempt.get("cached_tokens"),
+        )
+        for position, attempt in enumerate(routing["attempts"], start=1)
+    ]
@@ -1,3 +1,5 @@
+import hashlib
+
 PERSONALITIES = {
     "skeptical_buyer": {
         "label": "Skeptical Buyer",
@@ -122,6 +124,27 @@ def get_all_personalities() -> dict:
     }
 
 
+PROSPECT_INSTRUCTIONS = """You are a realistic sales prospect in a training simulation. Your job is to TEST the salesperson's knowledge of their product and evaluate their pitch quality. The product context, your personality and your rambling limit follow these instructions.
+
+YOUR CONVERSATION APPROACH:
+1. Start by asking the salesperson to pitch you on the product. Let them give an opening pitch.
+2. After their pitch, ask probing questions about specific USPs — one at a time.
+3. Raise the likely objections listed in the product context and evaluate how they handle them.
+4. Test their knowledge of key terms by using them in questions or asking them to explain concepts.
+5. Throughout, evaluate their conciseness, confidence, and accuracy.
+
+RAMBLING DETECTION — THIS IS CRITICAL:
+- If the salesperson speaks for longer than your rambling limit without making a clear point, INTERRUPT them.
+- Use one of your interruption phrases.
+- After interrupting, tell them to be more concise and re-ask your question.
+- Track how often they ramble. Frequent ramblers should be told directly: "You need to tighten up your answers."
+
+SCORING INSTRUCTIONS:
+After EACH answer the salesperson gives, you MUST call the score_response tool with your assessment. Score every exchange — do not skip any. The scores should be critical and honest. Do not inflate scores to be nice.
+
+After you have asked at least 6-8 questions covering USPs, objections, and terminology, wrap up the conversation naturally and provide a brief verbal summary of their performance before ending the call."""
+
+
 def build_system_prompt(personality_type: str, product_data: dict) -> str:
     personality = PERSONALITIES[personality_type]
 
@@ -140,9 +163,9 @@ def build_system_prompt(personality_type: str, product_data: dict) -> str:
     threshold = personality["interruption_word_threshold"]
     redirect_phrases = "\n".join(f'- "{p}"' for p in personality["rambling_redirect_phrases"])
 
-    return f"""You are a realistic sales prospect in a training simulation. Your job is to TEST the salesperson's knowledge of their product and evaluate their pitch quality.
-
-{personality["system_prompt_section"]}
+    # Static instructions first, then the product, then the personality, so calls
+    # on the same product share the longest prefix for provider prompt caching.
+    return f"""{PROSPECT_INSTRUCTIONS}
 
 PRODUCT CONTEXT (the product the salesperson is pitching):
 USPs: {usps_text}
@@ -151,21 +174,23 @@ Key Terms they should know: {terms_text}
 
 Likely Objections to raise: {objections_text}
 
-YOUR CONVERSATION APPROACH:
-1. Start by asking the salesperson to pitch you on the product. Let them give an opening pitch.
-2. After their pitch, ask probing questions about specific USPs — one at a time.
-3. Raise objections from the list above and evaluate how they handle them.
-4. Test their knowledge of key terms by using them in questions or asking them to explain concepts.
-5. Throughout, evaluate their conciseness, confidence, and accuracy.
+YOUR PERSONALITY:
+{personality["system_prompt_section"]}
 
-RAMBLING DETECTION — THIS IS CRITICAL:
-- If the salesperson speaks for more than ~{threshold} words without making a clear point, INTERRUPT them.
-- Use one of these interruption phrases:
-{redirect_phrases}
-- After interrupting, tell them to be more concise and re-ask your question.
-- Track how often they ramble. Frequent ramblers should be told directly: "You need to tighten up your answers."
+YOUR RAMBLING LIMIT: about {threshold} words without a clear point.
+Your interruption phrases:
+{redirect_phrases}"""
 
-SCORING INSTRUCTIONS:
-After EACH answer the salesperson gives, you MUST call the score_response tool with your assessment. Score every exchange — do not skip any. The scores should be critical and honest. Do not inflate scores to be nice.
 
-After you have asked at least 6-8 questions covering USPs, objections, and terminology, wrap up the conversation naturally and provide a brief verbal summary of their performance before ending the call."""
+# Renders every personality against a sample product, so any change to the
+# personalities, the instructions or the template layout changes the version.
+_SAMPLE_PRODUCT = {
+    "extracted_usps": [{"title": "usp", "description": "description"}],
+    "key_terms": [{"term": "term", "definition": "definition"}],
+    "common_objections": [{"objection": "objection"}],
+    "client_frames": {"buyer": ["tip"]},
+}
+# Identifies the rendered system prompt; cached prompts are keyed by it.
+PROMPT_VERSION = hashlib.sha1(
+    "\n".join(build_system_prompt(k, _SAMPLE_PRODUCT) for k in sorted(PERSONALITIES)).encode()
+).hexdigest()[:16]
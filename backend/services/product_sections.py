@@ -0,0 +1,172 @@
+"""Section-level diffing and merging for product document updates.
+
+A document is split into sections at heading-like lines. Each product keeps
+the hash of every section plus the keys of the items extracted from it, so
+an update only sends new or edited sections to the extractor, and items
+from sections that were removed or rewritten are dropped; client-frame
+tips are recorded and dropped per section the same way. Items from the
+original whole-document extraction have no recorded section; they are
+dropped only when their name appears in removed text and nowhere in the
+new document. Unattributed tips have no name to match, so they stay until
+the next full extraction replaces them.
+"""
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+SECTION_MAX_CHARS = int(os.getenv("SECTION_MAX_CHARS", "4000"))
+# Above this share of changed text a single full extraction is cheaper and better.
+FULL_REEXTRACT_RATIO = float(os.getenv("FULL_REEXTRACT_RATIO", "0.6"))
+EXTRACTION_CONCURRENCY = int(os.getenv("EXTRACTION_CONCURRENCY", "4"))
+
+ITEM_KEYS = {"usps": "title", "key_terms": "term", "common_objections": "objection"}
+PRODUCT_FIELDS = {"usps": "extracted_usps", "key_terms": "key_terms", "common_objections": "common_objections"}
+
+_WHITESPACE = re.compile(r"\s+")
+_HEADING = re.compile(r"^(#{1,6}\s+\S.*|[A-Z0-9][^.!?;,]{0,78})$")
+
+
+def _is_heading(line: str, next_line: str) -> bool:
+    # A short unpunctuated line followed by body text, or a markdown heading.
+    return bool(_HEADING.match(line)) and (line.startswith("#") or len(next_line) > len(line))
+
+
+def split_sections(text: str) -> list:
+    lines = [line.strip() for line in text.splitlines()]
+    sections, current, size = [], [], 0
+    for i, line in enumerate(lines):
+        if not line:
+            continue
+        next_line = next((l for l in lines[i + 1:] if l), "")
+        if current and (_is_heading(line, next_line) or size + len(line) > SECTION_MAX_CHARS):
+            sections.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line)
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+
+def section_hash(section: str) -> str:
+    # Whitespace-insensitive, so re-exported PDFs with different wrapping still match.
+    return hashlib.sha1(_WHITESPACE.sub(" ", section).strip().lower().encode()).hexdigest()[:16]
+
+
+def document_sections(text: str) -> list:
+    """Section records for text whose items came from a whole-document extraction."""
+    return [{"hash": section_hash(section), "items": {}} for section in split_sections(text)]
+
+
+def item_key(kind: str, item: dict) -> str:
+    return str(item.get(ITEM_KEYS[kind], "")).strip().lower()
+
+
+def tip_key(tip) -> str:
+    return _WHITESPACE.sub(" ", str(tip)).strip().lower()
+
+
+def _tips(tips) -> list:
+    return tips if isinstance(tips, list) else [tips]
+
+
+def plan_update(old_sections: list, old_text: str, new_text: str) -> dict:
+    """Which new sections need extracting and which old ones are gone."""
+    texts = split_sections(new_text)
+    hashes = [section_hash(t) for t in texts]
+    old_hashes = {s["hash"] for s in old_sections}
+    added = [i for i, h in enumerate(hashes) if h not in old_hashes]
+    removed = [s for s in old_sections if s["hash"] not in set(hashes)]
+    removed_hashes = {s["hash"] for s in removed}
+    changed_chars = sum(len(texts[i]) for i in added)
+    return {
+        "texts": texts,
+        "hashes": hashes,
+        "added": added,
+        "removed": removed,
+        "removed_text": "\n".join(t for t in split_sections(old_text) if section_hash(t) in removed_hashes).lower(),
+        "new_text": new_text.lower(),
+        "full": changed_chars > FULL_REEXTRACT_RATIO * max(1, sum(len(t) for t in texts)),
+    }
+
+
+def extract_sections(extract, texts: list) -> list:
+    """Run the extractor over sections concurrently, preserving order."""
+    if not texts:
+        return []
+    with ThreadPoolExecutor(max_workers=min(EXTRACTION_CONCURRENCY, len(texts))) as pool:
+        return list(pool.map(extract, texts))
+
+
+def merge_extractions(current: dict, plan: dict, old_sections: list, extracted: list) -> tuple:
+    """Apply an incremental update; returns (fields, sections).
+
+    `current` holds the product's usps/key_terms/common_objections/client_frames,
+    `extracted` one extraction result per index in plan["added"].
+    """
+    stale = {kind: set() for kind in ITEM_KEYS}
+    attributed = {kind: set() for kind in ITEM_KEYS}
+    for section in old_sections:
+        for kind, keys in section.get("items", {}).items():
+            attributed[kind].update(keys)
+            if section in plan["removed"]:
+                stale[kind].update(keys)
+    for kind in ITEM_KEYS:
+        for item in current.get(kind, []) or []:
+            key = item_key(kind, item)
+            if key and key not in attributed[kind] and key in plan["removed_text"] and key not in plan["new_text"]:
+                stale[kind].add(key)
+
+    fields = {}
+    new_items = {kind: {} for kind in ITEM_KEYS}
+    for result in extracted:
+        for kind in ITEM_KEYS:
+            for item in result.get(kind, []) or []:
+                new_items[kind].setdefault(item_key(kind, item), item)
+    for kind in ITEM_KEYS:
+        # Re-extracted items replace same-named ones in place; new ones go at the end.
+        kept = [
+            new_items[kind].pop(item_key(kind, item), item)
+            for item in current.get(kind, []) or []
+            if item_key(kind, item) not in stale[kind] or item_key(kind, item) in new_items[kind]
+        ]
+        fields[kind] = kept + list(new_items[kind].values())
+
+    # Tips recorded only on removed sections go; a tip another section still has stays.
+    kept_tips, stale_tips = set(), set()
+    for section in old_sections:
+        target = stale_tips if section in plan["removed"] else kept_tips
+        for buyer, keys in section.get("frames", {}).items():
+            target.update((buyer, key) for key in keys)
+    stale_tips -= kept_tips
+    frames = {}
+    for buyer, tips in (current.get("client_frames") or {}).items():
+        kept = [tip for tip in _tips(tips) if (buyer, tip_key(tip)) not in stale_tips]
+        if kept:
+            frames[buyer] = kept
+    for result in extracted:
+        for buyer, tips in (result.get("client_frames") or {}).items():
+            existing = frames.setdefault(buyer, [])
+            seen = {tip_key(tip) for tip in existing}
+            for tip in _tips(tips):
+                if tip_key(tip) not in seen:
+                    seen.add(tip_key(tip))
+                    existing.append(tip)
+    fields["client_frames"] = frames
+
+    kept_sections = {s["hash"]: s for s in old_sections if s not in plan["removed"]}
+    by_index = dict(zip(plan["added"], extracted))
+    sections = []
+    for i, h in enumerate(plan["hashes"]):
+        if i in by_index:
+            result = by_index[i]
+            items = {kind: sorted({item_key(kind, item) for item in result.get(kind, []) or []}) for kind in ITEM_KEYS}
+            tips = {
+                buyer: sorted({tip_key(tip) for tip in _tips(buyer_tips)})
+                for buyer, buyer_tips in (result.get("client_frames") or {}).items()
+            }
+            sections.append({"hash": h, "items": items, "frames": tips})
+        else:
+            sections.append(kept_sections.get(h, {"hash": h, "items": {}}))
+    return fields, sections
@@ -0,0 +1,214 @@
+"""Re-score historical sessions with the current scoring prompt and model.
+
+    python -m services.rescore --since 2026-01-01 --dry-run
+    python -m services.rescore --since 2026-01-01 --concurrency 8 --promote
+
+Each result is committed as its own Score row tagged with SCORING_VERSION,
+so an interrupted run resumes by simply running the same command again:
+sessions that already have a row for the current version are skipped.
+With --promote, rows left by an earlier run without it are promoted in
+place rather than re-scored.
+"""
+import argparse
+import datetime
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session as DBSession
+
+from database import SessionLocal
+from models import Session, Product, Score
+from services.model_routing import model_call_rows
+from services.scoring import (
+    SCORING_SYSTEM_MESSAGE,
+    SCORING_VERSION,
+    build_scoring_prompt,
+    score_full_session,
+    scoring_lease_expired_before,
+    scoring_tiers,
+)
+
+# USD per 1M tokens (input, output).
+MODEL_PRICING = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+ESTIMATED_OUTPUT_TOKENS = int(os.getenv("RESCORE_ESTIMATED_OUTPUT_TOKENS", "1500"))
+CHARS_PER_TOKEN = 4
+
+
+def select_session_ids(db: DBSession, args) -> list:
+    done = select(Score.session_id).where(Score.version == SCORING_VERSION, Score.status != "scoring")
+    if args.promote and not args.dry_run:
+        # Rows from an earlier run without --promote still need promoting; they cost nothing.
+        done = done.where(Score.is_current.is_(True))
+    stmt = select(Session.id).where(Session.status == "completed", Session.id.not_in(done))
+    if args.session_ids:
+        stmt = stmt.where(Session.id.in_(args.session_ids))
+    if args.since:
+        stmt = stmt.where(Session.created_at >= args.since)
+    if args.until:
+        stmt = stmt.where(Session.created_at < args.until)
+    if args.product_id:
+        stmt = stmt.where(Session.product_id == args.product_id)
+    if args.personality:
+        stmt = stmt.where(Session.personality_type == args.personality)
+    stmt = stmt.order_by(Session.id)
+    if args.limit:
+        stmt = stmt.limit(args.limit)
+    return db.execute(stmt).scalars().all()
+
+
+def load_scoring_input(db: DBSession, session_id: int):
+    session = db.get(Session, session_id)
+    product = db.get(Product, session.product_id)
+    if not product:
+        return None
+    product_data = {
+        "extracted_usps": product.extracted_usps or [],
+        "key_terms": product.key_terms or [],
+    }
+    return session.transcript or [], product_data, session.personality_type
+
+
+def estimate_cost(session_ids: list) -> dict:
+    # Priced at the tier each session is routed to first; escalations are not predictable.
+    by_model = {}
+    db = SessionLocal()
+    try:
+        for session_id in session_ids:
+            scoring_input = load_scoring_input(db, session_id)
+            if scoring_input:
+                prompt = build_scoring_prompt(*scoring_input)
+                _, model = scoring_tiers(scoring_input[0])[0]
+                usage = by_model.setdefault(model, {"sessions": 0, "input_tokens": 0, "output_tokens": 0})
+                usage["sessions"] += 1
+                usage["input_tokens"] += (len(prompt) + len(SCORING_SYSTEM_MESSAGE)) // CHARS_PER_TOKEN
+                usage["output_tokens"] += ESTIMATED_OUTPUT_TOKENS
+            db.expunge_all()
+    finally:
+        db.close()
+
+    cost = 0
+    for model, usage in by_model.items():
+        input_price, output_price = MODEL_PRICING.get(model, MODEL_PRICING["gpt-4o"])
+        cost += usage["input_tokens"] * input_price + usage["output_tokens"] * output_price
+    return {
+        "sessions": len(session_ids),
+        "models": by_model,
+        "input_tokens": sum(u["input_tokens"] for u in by_model.values()),
+        "output_tokens": sum(u["output_tokens"] for u in by_model.values()),
+        "estimated_cost_usd": round(cost / 1_000_000, 2),
+    }
+
+
+def rescore_session(session_id: int, promote: bool) -> str:
+    """Returns "scored", "promoted" or "skipped"."""
+    db = SessionLocal()
+    try:
+        existing = db.execute(select(Score).where(
+            Score.session_id == session_id, Score.version == SCORING_VERSION, Score.status != "scoring"
+        )).scalars().first()
+        if existing:
+            if not promote or existing.is_current:
+                return "skipped"
+            db.execute(update(Score).where(Score.session_id == session_id, Score.id != existing.id).values(is_current=False))
+            existing.is_current = True
+            db.commit()
+            return "promoted"
+
+        scoring_input = load_scoring_input(db, session_id)
+        if not scoring_input:
+            return "skipped"
+        # The webhook is still streaming this version's score; leave the session to it.
+        in_progress = db.execute(select(Score.id).where(
+            Score.session_id == session_id,
+            Score.version == SCORING_VERSION,
+            Score.status == "scoring",
+            Score.claimed_at >= scoring_lease_expired_before(),
+        )).first()
+        if in_progress:
+            return "skipped"
+        result = score_full_session(*scoring_input)
+
+        # A streamed score for this version that never finished would block the insert.
+        db.execute(delete(Score).where(
+            Score.session_id == session_id,
+            Score.version == SCORING_VERSION,
+            Score.status == "scoring",
+            or_(Score.claimed_at.is_(None), Score.claimed_at < scoring_lease_expired_before()),
+        ))
+        db.add_all(model_call_rows("scoring", result, session_id=session_id))
+        if promote:
+            db.execute(update(Score).where(Score.session_id == session_id).values(is_current=False))
+        db.add(Score(
+            session_id=session_id,
+            version=SCORING_VERSION,
+            is_current=promote,
+            term_understanding=result.get("term_understanding", 0),
+            description_breadth=result.get("description_breadth", 0),
+            conciseness=result.get("conciseness", 0),
+            objection_handling=result.get("objection_handling", 0),
+            usp_framing=result.get("usp_framing", 0),
+            confidence=result.get("confidence", 0),
+            overall=result.get("overall", 0),
+            detailed_feedback={
+                "per_answer_feedback": result.get("per_answer_feedback", []),
+                "strengths": result.get("strengths", []),
+                "improvements": result.get("improvements", []),
+                "rambling_instances": result.get("rambling_instances", 0),
+            },
+        ))
+        db.commit()
+        return "scored"
+    finally:
+        db.close()
+
+
+def rescore(session_ids: list, concurrency: int, promote: bool) -> dict:
+    stats = {"scored": 0, "promoted": 0, "skipped": 0, "failed": []}
+    # Submit in windows so tens of thousands of ids never become pending futures at once.
+    window = concurrency * 4
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for start in range(0, len(session_ids), window):
+            futures = {
+                pool.submit(rescore_session, session_id, promote): session_id
+                for session_id in session_ids[start:start + window]
+            }
+            for future in as_completed(futures):
+                session_id = futures[future]
+                try:
+                    stats[future.result()] += 1
+                except Exception as exc:
+                    stats["failed"].append(session_id)
+                    print(f"session {session_id} failed: {exc}", file=sys.stderr)
+            finished = stats["scored"] + stats["promoted"] + stats["skipped"] + len(stats["failed"])
+            print(f"{finished}/{len(session_ids)} done", file=sys.stderr)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Re-score sessions as version {SCORING_VERSION}.")
+    parser.add_argument("--session-ids", type=int, nargs="*")
+    parser.add_argument("--since", type=datetime.datetime.fromisoformat)
+    parser.add_argument("--until", type=datetime.datetime.fromisoformat)
+    parser.add_argument("--product-id", type=int)
+    parser.add_argument("--personality")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--promote", action="store_true", help="Make the new scores the ones shown in the app")
+    parser.add_argument("--dry-run", action="store_true", help="Only estimate token usage and cost")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        session_ids = select_session_ids(db, args)
+    finally:
+        db.close()
+
+    if args.dry_run:
+        print(estimate_cost(session_ids))
+    else:
+        print(rescore(session_ids, args.concurrency, args.promote))
@@ -0,0 +1,108 @@
+"""Batched deletion of products and sessions, and the retention policy job.
+
+    python -m services.retention                      # purge soft-deleted products, apply retention
+    python -m services.retention --days 365 --action purge
+
+Everything is deleted with set-based DELETEs over bounded id batches, with a
+commit per batch, so no transaction holds the tables the webhooks write to
+for longer than one batch takes.
+"""
+import argparse
+import datetime
+import os
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session as DBSession
+
+from database import SessionLocal
+from models import Session, Product, Score, AnswerScore, SpeechMetrics, SearchDocument, ModelCall
+from services.archive import archive_old_transcripts
+
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "500"))
+# Sessions older than this are archived or purged; 0 disables the policy.
+SESSION_RETENTION_DAYS = int(os.getenv("SESSION_RETENTION_DAYS", "0"))
+RETENTION_ACTION = os.getenv("RETENTION_ACTION", "archive")
+RETENTION_ACTIONS = ("archive", "purge")
+
+
+def delete_sessions(db: DBSession, session_ids: list):
+    """Delete sessions and every row that references them. Caller commits."""
+    if not session_ids:
+        return
+    for model in (SearchDocument, AnswerScore, Score, SpeechMetrics, ModelCall):
+        db.execute(delete(model).where(model.session_id.in_(session_ids)))
+    db.execute(delete(Session).where(Session.id.in_(session_ids)))
+
+
+def _purge_sessions(db: DBSession, where, batch_size: int) -> int:
+    purged = 0
+    while True:
+        session_ids = db.execute(
+            select(Session.id).where(*where).order_by(Session.id).limit(batch_size)
+        ).scalars().all()
+        if not session_ids:
+            return purged
+        delete_sessions(db, session_ids)
+        db.commit()
+        purged += len(session_ids)
+
+
+def purge_product(db: DBSession, product_id: int, batch_size: int = DELETE_BATCH_SIZE) -> int:
+    """Delete a product with its sessions in batches. Returns sessions deleted."""
+    purged = _purge_sessions(db, [Session.product_id == product_id], batch_size)
+    db.execute(delete(SearchDocument).where(SearchDocument.product_id == product_id))
+    db.execute(delete(ModelCall).where(ModelCall.product_id == product_id))
+    db.execute(delete(Product).where(Product.id == product_id))
+    db.commit()
+    return purged
+
+
+def purge_product_job(product_id: int):
+    # Runs after the response, so it needs its own DB session.
+    db = SessionLocal()
+    try:
+        purge_product(db, product_id)
+    finally:
+        db.close()
+
+
+def purge_deleted_products(db: DBSession, batch_size: int = DELETE_BATCH_SIZE) -> int:
+    """Finish deletes that were soft-deleted but never purged (e.g. a restart)."""
+    product_ids = db.execute(select(Product.id).where(Product.deleted_at.is_not(None))).scalars().all()
+    for product_id in product_ids:
+        purge_product(db, product_id, batch_size)
+    return len(product_ids)
+
+
+def apply_retention(
+    db: DBSession,
+    older_than_days: int = SESSION_RETENTION_DAYS,
+    action: str = RETENTION_ACTION,
+    batch_size: int = DELETE_BATCH_SIZE,
+) -> int:
+    """Archive or purge sessions older than the retention window. Returns rows affected."""
+    if older_than_days <= 0:
+        return 0
+    if action == "archive":
+        return archive_old_transcripts(db, older_than_days, batch_size)
+    if action != "purge":
+        raise ValueError(f"Unknown retention action {action!r}; expected one of {RETENTION_ACTIONS}")
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=older_than_days)
+    # Pending/active sessions may still receive webhooks, so only finished ones go.
+    return _purge_sessions(db, [Session.created_at < cutoff, Session.status == "completed"], batch_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Purge deleted products and apply the session retention policy.")
+    parser.add_argument("--days", type=int, default=SESSION_RETENTION_DAYS)
+    parser.add_argument("--action", choices=RETENTION_ACTIONS, default=RETENTION_ACTION)
+    parser.add_argument("--batch-size", type=int, default=DELETE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        products = purge_deleted_products(db, args.batch_size)
+        sessions = apply_retention(db, args.days, args.action, args.batch_size)
+    finally:
+        db.close()
+    print(f"Purged {products} deleted products, {args.action}d {sessions} sessions past retention")
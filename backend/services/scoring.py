@@ -1,25 +1,25 @@
+import datetime
 import os
 import json
-from openai import OpenAI
+import hashlib
+
+from services.model_routing import FAST_MODEL, complete_json, route_tiers
+from services.streaming_json import StreamingJSONObject
 
 _client = None
 
 def get_client():
     global _client
     if _client is None:
+        # Imported on first use: the openai package dominates startup time.
+        from openai import OpenAI
+
         _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     return _client
 
-POST_CALL_SCORING_PROMPT = """You are a strict sales coach evaluating a salesperson's performance in a practice call.
-
-PRODUCT CONTEXT:
-USPs: {usps_json}
-Key Terms: {terms_json}
-
-PERSONALITY TYPE: {personality_type}
-
-FULL TRANSCRIPT:
-{transcript}
+# Laid out static rubric -> product -> session so requests for the same product
+# share the longest possible prefix and hit the provider's prompt cache.
+POST_CALL_SCORING_PROMPT = """You are a strict sales coach evaluating a salesperson's performance in a practice call. The product context, the buyer personality they faced and the full transcript follow these instructions.
 
 Evaluate the salesperson's performance across these 6 dimensions on a 0-100 scale. Be CRITICAL — most salespeople should score between 40-75. Only give 80+ for genuinely excellent performance.
 
@@ -50,30 +50,117 @@ Return a JSON object with:
 10. "improvements": Array of 3-5 specific things to work on, ordered by priority
 11. "rambling_instances": Number of times they rambled or were too wordy
 
-Return ONLY valid JSON."""
+Return ONLY valid JSON.
+
+PRODUCT CONTEXT:
+USPs: {usps_json}
+Key Terms: {terms_json}
+
+PERSONALITY TYPE: {personality_type}
+
+FULL TRANSCRIPT:
+{transcript}"""
+
+
+SCORING_MODEL = os.getenv("SCORING_MODEL", "gpt-4o")
+SCORING_SYSTEM_MESSAGE = "You are a strict sales performance evaluator. Return only valid JSON."
+# Transcripts up to this many characters (roughly a five minute call) start on FAST_MODEL.
+SCORING_FAST_MAX_CHARS = int(os.getenv("SCORING_FAST_MAX_CHARS", "6000"))
+# A fast-tier "overall" this far from the dimension average is treated as a low-confidence answer.
+SCORING_CONSISTENCY_TOLERANCE = float(os.getenv("SCORING_CONSISTENCY_TOLERANCE", "20"))
+SCORE_DIMENSIONS = [
+    "term_understanding",
+    "description_breadth",
+    "conciseness",
+    "objection_handling",
+    "usp_framing",
+    "confidence",
+]
 
+_SCORING_MODELS = f"{FAST_MODEL}/{SCORING_MODEL}" if FAST_MODEL and FAST_MODEL != SCORING_MODEL else SCORING_MODEL
+# Identifies the models + prompt that produced a Score row; changes whenever either does.
+SCORING_VERSION = f"{_SCORING_MODELS}:{hashlib.sha1(POST_CALL_SCORING_PROMPT.encode()).hexdigest()[:8]}"
+# A "scoring" row belongs to the run that claimed it until this long after the claim;
+# only then may a redelivered report or a rescore take it over.
+SCORING_LEASE_SECONDS = int(os.getenv("SCORING_LEASE_SECONDS", "600"))
 
-def score_full_session(transcript: list, product_data: dict, personality_type: str) -> dict:
+
+def scoring_lease_expired_before() -> datetime.datetime:
+    return datetime.datetime.utcnow() - datetime.timedelta(seconds=SCORING_LEASE_SECONDS)
+
+
+def format_transcript(transcript: list) -> str:
     transcript_text = ""
     for msg in transcript:
         role = msg.get("role", "unknown")
         content = msg.get("content", msg.get("message", ""))
         transcript_text += f"{role.upper()}: {content}\n"
+    return transcript_text
 
-    prompt = POST_CALL_SCORING_PROMPT.format(
+
+def build_scoring_prompt(transcript: list, product_data: dict, personality_type: str) -> str:
+    return POST_CALL_SCORING_PROMPT.format(
         usps_json=json.dumps(product_data.get("extracted_usps", []), indent=2),
         terms_json=json.dumps(product_data.get("key_terms", []), indent=2),
         personality_type=personality_type,
-        transcript=transcript_text,
+        transcript=format_transcript(transcript),
     )
 
-    response = get_client().chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": "You are a strict sales performance evaluator. Return only valid JSON."},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.3,
-        response_format={"type": "json_object"},
-    )
-    return json.loads(response.choices[0].message.content)
+
+def scoring_tiers(transcript: list) -> list:
+    return route_tiers(len(format_transcript(transcript)), SCORING_FAST_MAX_CHARS, SCORING_MODEL)
+
+
+def validate_scores(result: dict):
+    values = [result.get(key) for key in SCORE_DIMENSIONS + ["overall"]]
+    if not all(isinstance(v, (int, float)) and 0 <= v <= 100 for v in values):
+        return "invalid_scores"
+    if not isinstance(result.get("per_answer_feedback"), list):
+        return "invalid_feedback"
+    average = sum(values[:-1]) / len(SCORE_DIMENSIONS)
+    if abs(values[-1] - average) > SCORING_CONSISTENCY_TOLERANCE:
+        return "inconsistent_overall"
+    return None
+
+
+def stream_completion(request: dict, on_progress) -> tuple:
+    """Stream a completion, reporting each score and per-answer entry as it completes."""
+    parser = StreamingJSONObject(stream_arrays=["per_answer_feedback"])
+    # Each attempt starts over; progress from an escalated tier is discarded.
+    on_progress(("reset", None, None))
+    parts = []
+    usage = None
+    stream = get_client().chat.completions.create(**request, stream=True, stream_options={"include_usage": True})
+    for chunk in stream:
+        # Usage arrives on a final chunk with no choices.
+        usage = getattr(chunk, "usage", None) or usage
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if not delta:
+            continue
+        parts.append(delta)
+        for event in parser.feed(delta):
+            on_progress(event)
+    return "".join(parts), usage
+
+
+def score_full_session(transcript: list, product_data: dict, personality_type: str, on_progress=None) -> dict:
+    """Score a finished call. With `on_progress`, the response is streamed and
+    partial results are passed to it as StreamingJSONObject events."""
+    prompt = build_scoring_prompt(transcript, product_data, personality_type)
+
+    def create(model: str) -> tuple:
+        request = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SCORING_SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.3,
+            "response_format": {"type": "json_object"},
+        }
+        if on_progress:
+            return stream_completion(request, on_progress)
+        response = get_client().chat.completions.create(**request)
+        return response.choices[0].message.content, response.usage
+
+    return complete_json(create, scoring_tiers(transcript), validate_scores)
@@ -0,0 +1,207 @@
+import argparse
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.orm import Session as DBSession
+
+from database import SessionLocal
+from models import SearchDocument, Session, AnswerScore, Product
+
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5(
+        content, content='search_documents', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN
+        INSERT INTO search_documents_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN
+        INSERT INTO search_documents_fts(search_documents_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN
+        INSERT INTO search_documents_fts(search_documents_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO search_documents_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+
+POSTGRES_FTS_DDL = [
+    """CREATE INDEX IF NOT EXISTS ix_search_documents_tsv
+        ON search_documents USING GIN (to_tsvector('english', content))""",
+]
+
+
+def create_search_index(bind):
+    with bind.begin() as conn:
+        if bind.dialect.name == "sqlite":
+            existed = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = 'search_documents_fts'")
+            ).first()
+            for ddl in SQLITE_FTS_DDL:
+                conn.execute(text(ddl))
+            if not existed:
+                conn.execute(text("INSERT INTO search_documents_fts(search_documents_fts) VALUES ('rebuild')"))
+        elif bind.dialect.name == "postgresql":
+            for ddl in POSTGRES_FTS_DDL:
+                conn.execute(text(ddl))
+
+
+# Indexing returns Core statements so the same code serves both the sync
+# routers and the async webhook handlers: `db.execute(stmt)` for each.
+
+def _replace(kind: str, source_id: int, rows: list) -> list:
+    statements = [delete(SearchDocument).where(SearchDocument.kind == kind, SearchDocument.source_id == source_id)]
+    rows = [r for r in rows if r["content"].strip()]
+    if rows:
+        statements.append(insert(SearchDocument).values(rows))
+    return statements
+
+
+def transcript_statements(session: Session, transcript: list) -> list:
+    rows = []
+    for position, msg in enumerate(transcript or []):
+        role = msg.get("role", "unknown")
+        if role == "system":
+            continue
+        rows.append({
+            "user_id": session.user_id,
+            "kind": "transcript",
+            "source_id": session.id,
+            "session_id": session.id,
+            "product_id": session.product_id,
+            "role": role,
+            "position": position,
+            "content": msg.get("content", msg.get("message", "")) or "",
+        })
+    return _replace("transcript", session.id, rows)
+
+
+def answer_score_statements(session: Session, answer_score: AnswerScore) -> list:
+    rows = [{
+        "user_id": session.user_id,
+        "kind": "feedback",
+        "source_id": answer_score.id,
+        "session_id": session.id,
+        "product_id": session.product_id,
+        "content": "\n".join(filter(None, [answer_score.question, answer_score.answer_summary, answer_score.feedback])),
+    }]
+    return _replace("feedback", answer_score.id, rows)
+
+
+def product_statements(product: Product) -> list:
+    usp_rows = [
+        {
+            "user_id": product.user_id,
+            "kind": "usp",
+            "source_id": product.id,
+            "product_id": product.id,
+            "position": position,
+            "content": "\n".join(filter(None, [
+                usp.get("title", ""),
+                usp.get("description", ""),
+                " ".join(str(p) for p in usp.get("proof_points", []) or []),
+            ])),
+        }
+        for position, usp in enumerate(product.extracted_usps or [])
+    ]
+    term_rows = [
+        {
+            "user_id": product.user_id,
+            "kind": "term",
+            "source_id": product.id,
+            "product_id": product.id,
+            "position": position,
+            "content": f"{term.get('term', '')}: {term.get('definition', '')}",
+        }
+        for position, term in enumerate(product.key_terms or [])
+    ]
+    return _replace("usp", product.id, usp_rows) + _replace("term", product.id, term_rows)
+
+
+def _fts5_query(query: str) -> str:
+    # Quote every token so user input can never be parsed as FTS5 syntax.
+    return " ".join('"' + token.replace('"', '""') + '"' for token in query.split())
+
+
+def search_documents(
+    db: DBSession,
+    user_id: int,
+    query: str,
+    kind: str = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> dict:
+    dialect = db.get_bind().dialect.name
+    params = {"user_id": user_id, "kind": kind, "limit": limit, "offset": offset}
+    kind_filter = "AND d.kind = :kind" if kind else ""
+
+    if dialect == "sqlite":
+        params["query"] = _fts5_query(query)
+        source = "search_documents_fts JOIN search_documents d ON d.id = search_documents_fts.rowid"
+        match = "search_documents_fts MATCH :query"
+        snippet = "snippet(search_documents_fts, 0, '[', ']', '…', 12)"
+        rank = "bm25(search_documents_fts)"
+        order = "rank ASC"
+    elif dialect == "postgresql":
+        params["query"] = query
+        source = "search_documents d, websearch_to_tsquery('english', :query) q"
+        match = "to_tsvector('english', d.content) @@ q"
+        snippet = "ts_headline('english', d.content, q, 'StartSel=[, StopSel=], MaxWords=24')"
+        rank = "ts_rank(to_tsvector('english', d.content), q)"
+        order = "rank DESC"
+    else:
+        params["query"] = f"%{query}%"
+        source = "search_documents d"
+        match = "d.content LIKE :query"
+        snippet = "substr(d.content, 1, 200)"
+        rank = "0"
+        order = "d.id DESC"
+
+    if not params["query"].strip("%"):
+        return {"total": 0, "results": []}
+
+    where = f"WHERE {match} AND d.user_id = :user_id {kind_filter}"
+    total = db.execute(text(f"SELECT count(*) FROM {source} {where}"), params).scalar()
+    rows = db.execute(
+        text(
+            f"SELECT d.id, d.kind, d.session_id, d.product_id, d.role, d.position, "
+            f"{snippet} AS snippet, {rank} AS rank "
+            f"FROM {source} {where} ORDER BY {order}, d.id LIMIT :limit OFFSET :offset"
+        ),
+        params,
+    ).mappings().all()
+    return {"total": total, "results": [dict(r) for r in rows]}
+
+
+def reindex_all(db: DBSession) -> int:
+    """Rebuild every search document, e.g. for data created before search existed."""
+    count = 0
+    for session_id in db.execute(select(Session.id)).scalars().all():
+        session = db.get(Session, session_id)
+        for stmt in transcript_statements(session, session.transcript):
+            db.execute(stmt)
+        for answer_score in db.execute(select(AnswerScore).where(AnswerScore.session_id == session.id)).scalars().all():
+            for stmt in answer_score_statements(session, answer_score):
+                db.execute(stmt)
+        db.commit()
+        db.expunge_all()
+        count += 1
+    for product_id in db.execute(select(Product.id).where(Product.deleted_at.is_(None))).scalars().all():
+        product = db.get(Product, product_id)
+        for stmt in product_statements(product):
+            db.execute(stmt)
+        db.commit()
+        db.expunge_all()
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search index maintenance.")
+    parser.add_argument("--reindex", action="store_true", help="Rebuild all search documents")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        create_search_index(db.get_bind())
+        if args.reindex:
+            print(f"Reindexed {reindex_all(db)} sessions and products")
+    finally:
+        db.close()
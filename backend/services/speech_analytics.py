@@ -0,0 +1,194 @@
+import argparse
+import re
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session as DBSession
+
+from database import SessionLocal
+from models import Session, SpeechMetrics
+from services.personality import PERSONALITIES
+
+REP_ROLES = {"user"}
+PROSPECT_ROLES = {"assistant", "bot"}
+
+FILLER_PHRASES = [
+    "um", "uh", "er", "ah", "hmm", "like", "you know", "basically", "actually",
+    "literally", "i mean", "so yeah", "kind of", "sort of",
+]
+HEDGE_PHRASES = [
+    "i think", "i guess", "i believe", "maybe", "probably", "perhaps", "might",
+    "i'm not sure", "not sure", "possibly", "hopefully",
+]
+DEFAULT_WORD_THRESHOLD = 60
+
+WORD_RE = re.compile(r"[A-Za-z0-9']+")
+
+
+def _phrase_pattern(phrases: list) -> re.Pattern:
+    alternatives = sorted((re.escape(p) for p in phrases), key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+
+
+FILLER_RE = _phrase_pattern(FILLER_PHRASES)
+HEDGE_RE = _phrase_pattern(HEDGE_PHRASES)
+
+
+def word_count(text: str) -> int:
+    return len(WORD_RE.findall(text or ""))
+
+
+def message_text(msg: dict) -> str:
+    return msg.get("content", msg.get("message", "")) or ""
+
+
+def message_seconds(msg: dict):
+    # Vapi artifact messages carry `duration` in ms, or `time`/`endTime` epoch ms.
+    if msg.get("duration"):
+        return msg["duration"] / 1000
+    if msg.get("time") and msg.get("endTime"):
+        return max(msg["endTime"] - msg["time"], 0) / 1000
+    return None
+
+
+def word_threshold(personality_type: str) -> int:
+    personality = PERSONALITIES.get(personality_type) or {}
+    return personality.get("interruption_word_threshold", DEFAULT_WORD_THRESHOLD)
+
+
+def _rate(count: int, words: int) -> float:
+    # Occurrences per 100 words.
+    return round(count * 100 / words, 2) if words else 0.0
+
+
+def analyze_answer(text: str, seconds=None, threshold: int = DEFAULT_WORD_THRESHOLD) -> dict:
+    words = word_count(text)
+    fillers = len(FILLER_RE.findall(text))
+    hedges = len(HEDGE_RE.findall(text))
+    return {
+        "word_count": words,
+        "seconds": round(seconds, 2) if seconds else None,
+        "words_per_minute": round(words * 60 / seconds, 1) if seconds else None,
+        "filler_count": fillers,
+        "hedge_count": hedges,
+        "rambling": words > threshold,
+    }
+
+
+def analyze_transcript(transcript: list, personality_type: str) -> dict:
+    """Deterministic speech metrics for the rep's side of a transcript.
+
+    Consecutive rep messages are merged into one answer, since Vapi splits a
+    single spoken answer into several segments on pauses.
+    """
+    threshold = word_threshold(personality_type)
+
+    answers = []
+    current = None
+    prospect_seconds = 0.0
+    prospect_words = 0
+    for msg in transcript or []:
+        role = msg.get("role")
+        text = message_text(msg)
+        seconds = message_seconds(msg)
+        if role in REP_ROLES:
+            if current is None:
+                current = {"text": [], "seconds": 0.0, "timed": True}
+                answers.append(current)
+            current["text"].append(text)
+            if seconds is None:
+                current["timed"] = False
+            else:
+                current["seconds"] += seconds
+        elif role in PROSPECT_ROLES:
+            current = None
+            prospect_words += word_count(text)
+            prospect_seconds += seconds or 0.0
+
+    per_answer = [
+        analyze_answer(" ".join(a["text"]), a["seconds"] if a["timed"] else None, threshold)
+        for a in answers
+    ]
+
+    total_words = sum(a["word_count"] for a in per_answer)
+    timed = [a for a in per_answer if a["seconds"]]
+    timed_words = sum(a["word_count"] for a in timed)
+    rep_seconds = sum(a["seconds"] for a in timed)
+    fillers = sum(a["filler_count"] for a in per_answer)
+    hedges = sum(a["hedge_count"] for a in per_answer)
+
+    if rep_seconds and prospect_seconds:
+        talk_time_ratio = rep_seconds / (rep_seconds + prospect_seconds)
+    elif total_words + prospect_words:
+        # No timing data (e.g. live transcript events): fall back to word share.
+        talk_time_ratio = total_words / (total_words + prospect_words)
+    else:
+        talk_time_ratio = 0.0
+
+    return {
+        "answer_count": len(per_answer),
+        "total_words": total_words,
+        "average_words_per_answer": round(total_words / len(per_answer), 1) if per_answer else 0.0,
+        "max_words_per_answer": max((a["word_count"] for a in per_answer), default=0),
+        "words_per_minute": round(timed_words * 60 / rep_seconds, 1) if rep_seconds else None,
+        "filler_count": fillers,
+        "filler_rate": _rate(fillers, total_words),
+        "hedge_count": hedges,
+        "hedge_rate": _rate(hedges, total_words),
+        "word_threshold": threshold,
+        "rambling_instances": sum(1 for a in per_answer if a["rambling"]),
+        "talk_time_ratio": round(talk_time_ratio, 3),
+        "per_answer": per_answer,
+    }
+
+
+def analyze_sessions(sessions) -> list:
+    """Bulk form: `sessions` yields (transcript, personality_type) pairs."""
+    return [analyze_transcript(transcript, personality_type) for transcript, personality_type in sessions]
+
+
+def speech_metrics_values(metrics: dict) -> dict:
+    """Column values for a SpeechMetrics row."""
+    return {
+        "answer_count": metrics["answer_count"],
+        "total_words": metrics["total_words"],
+        "average_words_per_answer": metrics["average_words_per_answer"],
+        "words_per_minute": metrics["words_per_minute"],
+        "filler_rate": metrics["filler_rate"],
+        "hedge_rate": metrics["hedge_rate"],
+        "rambling_instances": metrics["rambling_instances"],
+        "talk_time_ratio": metrics["talk_time_ratio"],
+        "details": metrics,
+    }
+
+
+def backfill_speech_metrics(db: DBSession, batch_size: int = 500) -> int:
+    count = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Session.id, Session.transcript, Session.personality_type)
+            .outerjoin(SpeechMetrics, SpeechMetrics.session_id == Session.id)
+            .where(Session.id > last_id, Session.status == "completed", SpeechMetrics.id.is_(None))
+            .order_by(Session.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return count
+        results = analyze_sessions((r.transcript, r.personality_type) for r in rows)
+        for row, metrics in zip(rows, results):
+            db.add(SpeechMetrics(session_id=row.id, **speech_metrics_values(metrics)))
+        db.commit()
+        count += len(rows)
+        last_id = rows[-1].id
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute speech metrics for completed sessions that lack them.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"Computed speech metrics for {backfill_speech_metrics(db, args.batch_size)} sessions")
+    finally:
+        db.close()
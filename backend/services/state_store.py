@@ -0,0 +1,539 @@
+"""Shared state for running more than one API instance.
+
+Webhook deliveries for one call can land on any replica, so per-call state
+(the transcript buffer, live coaching metrics) and shared caches go through
+this store rather than module globals. STATE_BACKEND picks the backend:
+
+    memory   one process only (default)
+    sqlite   a file shared by processes on one host, for local multi-worker runs
+    redis    a network store shared by every replica, at STATE_REDIS_URL
+
+Values are JSON. Each method is atomic on its own; use lock() to make a
+read-modify-write atomic. Subscriptions receive messages published after
+they were opened, and a subscriber that falls behind loses the oldest ones.
+
+Store methods are synchronous so the sync routers can use them directly.
+On the event loop, wrap them in run_blocking(): the sqlite and redis
+backends do I/O and are moved to the threadpool, the memory backend is
+called inline.
+"""
+import asyncio
+import collections
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from fastapi.concurrency import run_in_threadpool
+
+STATE_BACKENDS = ("memory", "sqlite", "redis")
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+STATE_SQLITE_PATH = os.getenv("STATE_SQLITE_PATH", "./shared_state.db")
+STATE_REDIS_URL = os.getenv("STATE_REDIS_URL", "redis://localhost:6379/0")
+STATE_KEY_PREFIX = os.getenv("STATE_KEY_PREFIX", "calling-coach:")
+# Locks expire so an instance that dies while holding one can't wedge a call.
+LOCK_TTL_SECONDS = float(os.getenv("STATE_LOCK_TTL_SECONDS", "30"))
+SUBSCRIPTION_POLL_SECONDS = float(os.getenv("STATE_POLL_SECONDS", "0.05"))
+SUBSCRIPTION_QUEUE_SIZE = 100
+MESSAGE_RETENTION_SECONDS = 60
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _expires_at(ttl):
+    return None if ttl is None else time.time() + ttl
+
+
+class StoreLock:
+    """Async mutex shared by every instance using the same store."""
+
+    def __init__(self, store, name: str, ttl: float):
+        self.store = store
+        self.key = f"lock:{name}"
+        self.ttl = ttl
+        # Only the holder's token releases, so an expired holder can't free a successor's lock.
+        self.token = uuid.uuid4().hex
+
+    async def __aenter__(self):
+        delay = 0.005
+        while not await run_blocking(self.store.add, self.key, self.token, ttl=self.ttl, store=self.store):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        return self
+
+    async def __aexit__(self, *exc):
+        await run_blocking(self.store.delete_if, self.key, self.token, store=self.store)
+
+
+class Subscription(ABC):
+    """Messages on one channel; iterate it, then close() it."""
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+    @abstractmethod
+    async def get(self):
+        """Wait for the next message."""
+
+    @abstractmethod
+    async def close(self):
+        """Stop receiving; safe to call more than once."""
+
+
+class StateStore(ABC):
+    """Key/value with TTLs, hashes, lists and pub/sub, as used by the routers."""
+
+    # Whether calls do I/O and so must not run on the event loop; see run_blocking().
+    blocking = True
+
+    @abstractmethod
+    def get(self, key: str):
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value, ttl: float = None):
+        ...
+
+    @abstractmethod
+    def add(self, key: str, value, ttl: float = None) -> bool:
+        """Set only if the key is absent; returns whether it was set."""
+
+    @abstractmethod
+    def delete(self, *keys: str):
+        """Delete keys of any kind (value, hash or list)."""
+
+    @abstractmethod
+    def delete_if(self, key: str, value) -> bool:
+        """Delete a value only if it still equals `value`."""
+
+    @abstractmethod
+    def hset(self, key: str, field: str, value):
+        ...
+
+    @abstractmethod
+    def hdel(self, key: str, field: str):
+        ...
+
+    @abstractmethod
+    def hgetall(self, key: str) -> dict:
+        ...
+
+    @abstractmethod
+    def take_hash(self, key: str) -> dict:
+        """Remove and return a whole hash."""
+
+    @abstractmethod
+    def rpush(self, key: str, value):
+        ...
+
+    @abstractmethod
+    def take_list(self, key: str) -> list:
+        """Remove and return a whole list, oldest first."""
+
+    @abstractmethod
+    def publish(self, channel: str, message):
+        ...
+
+    @abstractmethod
+    async def subscribe(self, channel: str) -> Subscription:
+        ...
+
+    def lock(self, name: str, ttl: float = LOCK_TTL_SECONDS) -> StoreLock:
+        return StoreLock(self, name, ttl)
+
+
+class MemorySubscription(Subscription):
+    def __init__(self, store, channel: str):
+        self.store = store
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+
+    def deliver(self, payload: str):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(payload)
+
+    async def get(self):
+        return json.loads(await self.queue.get())
+
+    async def close(self):
+        self.store.unsubscribe(self)
+
+
+class MemoryStore(StateStore):
+    """Process-local store; values are still JSON so behaviour matches the shared backends."""
+
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._hashes = {}
+        self._lists = {}
+        self._subscribers = {}
+
+    def _value(self, key: str, now: float):
+        item = self._values.get(key)
+        if item is not None and item[1] is not None and item[1] <= now:
+            del self._values[key]
+            return None
+        return item
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._value(key, time.time())
+        return None if item is None else json.loads(item[0])
+
+    def set(self, key: str, value, ttl: float = None):
+        with self._lock:
+            self._values[key] = (_dumps(value), _expires_at(ttl))
+
+    def add(self, key: str, value, ttl: float = None) -> bool:
+        with self._lock:
+            if self._value(key, time.time()) is not None:
+                return False
+            self._values[key] = (_dumps(value), _expires_at(ttl))
+            return True
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+                self._hashes.pop(key, None)
+                self._lists.pop(key, None)
+
+    def delete_if(self, key: str, value) -> bool:
+        with self._lock:
+            item = self._value(key, time.time())
+            if item is None or item[0] != _dumps(value):
+                return False
+            del self._values[key]
+            return True
+
+    def hset(self, key: str, field: str, value):
+        with self._lock:
+            self._hashes.setdefault(key, {})[field] = _dumps(value)
+
+    def hdel(self, key: str, field: str):
+        with self._lock:
+            fields = self._hashes.get(key)
+            if fields is not None:
+                fields.pop(field, None)
+                if not fields:
+                    del self._hashes[key]
+
+    def hgetall(self, key: str) -> dict:
+        with self._lock:
+            fields = dict(self._hashes.get(key, {}))
+        return {field: json.loads(value) for field, value in fields.items()}
+
+    def take_hash(self, key: str) -> dict:
+        with self._lock:
+            fields = self._hashes.pop(key, {})
+        return {field: json.loads(value) for field, value in fields.items()}
+
+    def rpush(self, key: str, value):
+        with self._lock:
+            self._lists.setdefault(key, []).append(_dumps(value))
+
+    def take_list(self, key: str) -> list:
+        with self._lock:
+            values = self._lists.pop(key, [])
+        return [json.loads(value) for value in values]
+
+    def publish(self, channel: str, message):
+        payload = _dumps(message)
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                # Publishers may run in the threadpool; queues belong to the event loop.
+                subscription.loop.call_soon_threadsafe(subscription.deliver, payload)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+    async def subscribe(self, channel: str) -> Subscription:
+        subscription = MemorySubscription(self, channel)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: MemorySubscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL);
+CREATE TABLE IF NOT EXISTS hashes (key TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (key, field));
+CREATE TABLE IF NOT EXISTS lists (id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, value TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_lists_key ON lists (key, id);
+CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, payload TEXT NOT NULL, created_at REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_messages_channel ON messages (channel, id);
+"""
+
+
+class SQLiteSubscription(Subscription):
+    def __init__(self, store, channel: str):
+        self.store = store
+        self.channel = channel
+        self.pending = collections.deque()
+        self.last_id = store._connection().execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0]
+
+    def _poll(self) -> list:
+        return self.store._connection().execute(
+            "SELECT id, payload FROM messages WHERE channel = ? AND id > ? ORDER BY id LIMIT ?",
+            (self.channel, self.last_id, SUBSCRIPTION_QUEUE_SIZE),
+        ).fetchall()
+
+    async def get(self):
+        while not self.pending:
+            rows = await run_in_threadpool(self._poll)
+            if rows:
+                self.last_id = rows[-1][0]
+                self.pending.extend(json.loads(payload) for _, payload in rows)
+            else:
+                await asyncio.sleep(SUBSCRIPTION_POLL_SECONDS)
+        return self.pending.popleft()
+
+    async def close(self):
+        self.pending.clear()
+
+
+class SQLiteStore(StateStore):
+    """File-backed store for several worker processes on one host.
+
+    Subscribers poll a message table, so this is for local multi-process
+    testing rather than production fan-out.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(SQLITE_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads, so one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, key: str):
+        row = self._connection().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float = None):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)", (key, _dumps(value), _expires_at(ttl))
+        )
+
+    def add(self, key: str, value, ttl: float = None) -> bool:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM kv WHERE key = ? AND expires_at <= ?", (key, time.time()))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO kv (key, value, expires_at) VALUES (?, ?, ?)", (key, _dumps(value), _expires_at(ttl))
+            )
+            return cursor.rowcount == 1
+
+    def delete(self, *keys: str):
+        if not keys:
+            return
+        placeholders = ", ".join("?" * len(keys))
+        with self._transaction() as conn:
+            for table in ("kv", "hashes", "lists"):
+                conn.execute(f"DELETE FROM {table} WHERE key IN ({placeholders})", keys)
+
+    def delete_if(self, key: str, value) -> bool:
+        cursor = self._connection().execute("DELETE FROM kv WHERE key = ? AND value = ?", (key, _dumps(value)))
+        return cursor.rowcount == 1
+
+    def hset(self, key: str, field: str, value):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO hashes (key, field, value) VALUES (?, ?, ?)", (key, field, _dumps(value))
+        )
+
+    def hdel(self, key: str, field: str):
+        self._connection().execute("DELETE FROM hashes WHERE key = ? AND field = ?", (key, field))
+
+    def hgetall(self, key: str) -> dict:
+        rows = self._connection().execute("SELECT field, value FROM hashes WHERE key = ?", (key,)).fetchall()
+        return {field: json.loads(value) for field, value in rows}
+
+    def take_hash(self, key: str) -> dict:
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT field, value FROM hashes WHERE key = ?", (key,)).fetchall()
+            conn.execute("DELETE FROM hashes WHERE key = ?", (key,))
+        return {field: json.loads(value) for field, value in rows}
+
+    def rpush(self, key: str, value):
+        self._connection().execute("INSERT INTO lists (key, value) VALUES (?, ?)", (key, _dumps(value)))
+
+    def take_list(self, key: str) -> list:
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT value FROM lists WHERE key = ? ORDER BY id", (key,)).fetchall()
+            conn.execute("DELETE FROM lists WHERE key = ?", (key,))
+        return [json.loads(value) for value, in rows]
+
+    def publish(self, channel: str, message):
+        now = time.time()
+        conn = self._connection()
+        cursor = conn.execute(
+            "INSERT INTO messages (channel, payload, created_at) VALUES (?, ?, ?)", (channel, _dumps(message), now)
+        )
+        if cursor.lastrowid % 100 == 0:
+            conn.execute("DELETE FROM messages WHERE created_at < ?", (now - MESSAGE_RETENTION_SECONDS,))
+
+    async def subscribe(self, channel: str) -> Subscription:
+        return await run_in_threadpool(SQLiteSubscription, self, channel)
+
+
+# Compare-and-delete has to run server-side to be atomic.
+REDIS_DELETE_IF = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisSubscription(Subscription):
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self):
+        while True:
+            message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is not None:
+                return json.loads(message["data"])
+
+    async def close(self):
+        await self.pubsub.aclose()
+
+
+class RedisStore(StateStore):
+    """Redis (or any server speaking its protocol) shared by every replica."""
+
+    def __init__(self, url: str, prefix: str = STATE_KEY_PREFIX):
+        # Imported on first use so the default backend doesn't pay for it at startup.
+        import redis
+        self.url = url
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self._delete_if = self.client.register_script(REDIS_DELETE_IF)
+        self._async_client = None
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def _px(self, ttl):
+        return None if ttl is None else max(1, int(ttl * 1000))
+
+    def get(self, key: str):
+        value = self.client.get(self._key(key))
+        return None if value is None else json.loads(value)
+
+    def set(self, key: str, value, ttl: float = None):
+        self.client.set(self._key(key), _dumps(value), px=self._px(ttl))
+
+    def add(self, key: str, value, ttl: float = None) -> bool:
+        return bool(self.client.set(self._key(key), _dumps(value), px=self._px(ttl), nx=True))
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*(self._key(key) for key in keys))
+
+    def delete_if(self, key: str, value) -> bool:
+        return bool(self._delete_if(keys=[self._key(key)], args=[_dumps(value)]))
+
+    def hset(self, key: str, field: str, value):
+        self.client.hset(self._key(key), field, _dumps(value))
+
+    def hdel(self, key: str, field: str):
+        self.client.hdel(self._key(key), field)
+
+    def hgetall(self, key: str) -> dict:
+        return {field: json.loads(value) for field, value in self.client.hgetall(self._key(key)).items()}
+
+    def take_hash(self, key: str) -> dict:
+        pipe = self.client.pipeline()
+        pipe.hgetall(self._key(key))
+        pipe.delete(self._key(key))
+        fields, _ = pipe.execute()
+        return {field: json.loads(value) for field, value in fields.items()}
+
+    def rpush(self, key: str, value):
+        self.client.rpush(self._key(key), _dumps(value))
+
+    def take_list(self, key: str) -> list:
+        pipe = self.client.pipeline()
+        pipe.lrange(self._key(key), 0, -1)
+        pipe.delete(self._key(key))
+        values, _ = pipe.execute()
+        return [json.loads(value) for value in values]
+
+    def publish(self, channel: str, message):
+        self.client.publish(self._key(channel), _dumps(message))
+
+    async def subscribe(self, channel: str) -> Subscription:
+        if self._async_client is None:
+            import redis.asyncio
+            self._async_client = redis.asyncio.Redis.from_url(self.url, decode_responses=True)
+        pubsub = self._async_client.pubsub()
+        await pubsub.subscribe(self._key(channel))
+        return RedisSubscription(pubsub)
+
+
+def create_store(backend: str = STATE_BACKEND) -> StateStore:
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "sqlite":
+        return SQLiteStore(STATE_SQLITE_PATH)
+    if backend == "redis":
+        return RedisStore(STATE_REDIS_URL)
+    raise ValueError(f"Unknown STATE_BACKEND {backend!r}; expected one of {STATE_BACKENDS}")
+
+
+_store = None
+
+
+def get_store() -> StateStore:
+    global _store
+    if _store is None:
+        _store = create_store()
+    return _store
+
+
+async def run_blocking(fn, *args, store: StateStore = None, **kwargs):
+    """Call store-backed code from the event loop without blocking it."""
+    if not (store or get_store()).blocking:
+        return fn(*args, **kwargs)
+    return await run_in_threadpool(fn, *args, **kwargs)
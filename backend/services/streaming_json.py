@@ -0,0 +1,66 @@
+import json
+
+
+class StreamingJSONObject:
+    """Incremental parser for a JSON object that arrives in chunks.
+
+    feed() returns events as soon as they can be decoded:
+      ("field", key, value)  a top-level member is complete
+      ("item", key, value)   an element of one of `stream_arrays` is complete,
+                             before the rest of its array has arrived
+
+    Scalars are only known to be complete at the following delimiter, so a
+    top-level number is reported when its trailing comma or brace arrives.
+    """
+
+    def __init__(self, stream_arrays=()):
+        self.stream_arrays = set(stream_arrays)
+        self.text = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+        self.item_start = None
+
+    def feed(self, chunk: str) -> list:
+        events = []
+        self.text += chunk
+        text = self.text
+        for i in range(self.pos, len(text)):
+            ch = text[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.key_start is not None:
+                        self.key = json.loads(text[self.key_start:i + 1])
+                        self.key_start = None
+            elif ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.key is None:
+                    self.key_start = i
+            elif ch == ":" and self.depth == 1 and self.value_start is None:
+                self.value_start = i + 1
+            elif ch in "{[":
+                if ch == "[" and self.depth == 1 and self.value_start is not None and self.key in self.stream_arrays:
+                    self.item_start = i + 1
+                self.depth += 1
+            elif ch in ",}]":
+                if self.depth == 2 and self.item_start is not None:
+                    item = text[self.item_start:i].strip()
+                    if item:
+                        events.append(("item", self.key, json.loads(item)))
+                    self.item_start = i + 1 if ch == "," else None
+                elif self.depth == 1 and ch in ",}" and self.value_start is not None:
+                    events.append(("field", self.key, json.loads(text[self.value_start:i])))
+                    self.key = self.value_start = None
+                if ch != ",":
+                    self.depth -= 1
+        self.pos = len(text)
+        return events
@@ -0,0 +1,87 @@
+import os
+import time
+
+from services.state_store import StateStore, StoreLock, get_store
+
+TRANSCRIPT_FLUSH_SECONDS = float(os.getenv("TRANSCRIPT_FLUSH_SECONDS", "5"))
+# Calls with no events for this long are flushed and dropped (e.g. no "ended" delivered).
+TRANSCRIPT_IDLE_SECONDS = float(os.getenv("TRANSCRIPT_IDLE_SECONDS", "900"))
+# How often one instance looks for idle calls; the others skip the scan.
+TRANSCRIPT_IDLE_SCAN_SECONDS = float(os.getenv("TRANSCRIPT_IDLE_SCAN_SECONDS", "30"))
+
+CALLS_KEY = "transcript:calls"
+IDLE_SCAN_KEY = "transcript:idle-scan"
+
+
+class TranscriptBuffer:
+    """Per-call coalescing of Vapi transcript events.
+
+    Partial transcripts only replace the latest partial for their speaker;
+    final segments queue until the caller flushes them, which should happen
+    when add() reports the time bound was hit and when the call ends. State
+    lives in the shared store, so deliveries for one call may arrive at any
+    instance; timestamps are wall-clock for the same reason.
+    """
+
+    def __init__(
+        self,
+        flush_seconds: float = TRANSCRIPT_FLUSH_SECONDS,
+        idle_seconds: float = TRANSCRIPT_IDLE_SECONDS,
+        store: StateStore = None,
+    ):
+        self.flush_seconds = flush_seconds
+        self.idle_seconds = idle_seconds
+        self._store = store
+
+    @property
+    def store(self) -> StateStore:
+        return self._store or get_store()
+
+    def add(self, call_id: str, role: str, text: str, is_final: bool, now: float = None) -> bool:
+        """Record an event; returns True when pending finals are due to be written."""
+        now = time.time() if now is None else now
+        store = self.store
+        store.hset(CALLS_KEY, call_id, now)
+        if not is_final:
+            store.hset(f"transcript:{call_id}:partials", role, text)
+            return False
+
+        store.hdel(f"transcript:{call_id}:partials", role)
+        store.rpush(f"transcript:{call_id}:finals", {"role": role, "content": text})
+        first_pending_at = f"transcript:{call_id}:first"
+        if store.add(first_pending_at, now):
+            return self.flush_seconds <= 0
+        return now - (store.get(first_pending_at) or now) >= self.flush_seconds
+
+    def lock(self, call_id: str) -> StoreLock:
+        return self.store.lock(f"transcript:{call_id}")
+
+    def take(self, call_id: str, include_partials: bool = False) -> list:
+        """Remove and return segments to persist, oldest first."""
+        store = self.store
+        store.delete(f"transcript:{call_id}:first")
+        segments = store.take_list(f"transcript:{call_id}:finals")
+        if include_partials:
+            # The call is over: an utterance cut off mid-turn only exists as a partial.
+            partials = store.take_hash(f"transcript:{call_id}:partials")
+            segments.extend({"role": role, "content": text} for role, text in partials.items())
+        return segments
+
+    def discard(self, call_id: str):
+        store = self.store
+        store.delete(
+            f"transcript:{call_id}:first",
+            f"transcript:{call_id}:finals",
+            f"transcript:{call_id}:partials",
+        )
+        store.hdel(CALLS_KEY, call_id)
+
+    def idle_calls(self, now: float = None) -> list:
+        now = time.time() if now is None else now
+        store = self.store
+        if not store.add(IDLE_SCAN_KEY, now, ttl=min(TRANSCRIPT_IDLE_SCAN_SECONDS, self.idle_seconds)):
+            return []
+        return [cid for cid, last_event_at in store.hgetall(CALLS_KEY).items() if now - last_event_at >= self.idle_seconds]
+
+
+transcript_buffer = TranscriptBuffer()
@@ -1,12 +1,15 @@
 import os
-import json
-from openai import OpenAI
+
+from services.model_routing import complete_json, route_tiers
 
 _client = None
 
 def get_client():
     global _client
     if _client is None:
+        # Imported on first use: the openai package dominates startup time.
+        from openai import OpenAI
+
         _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     return _client
 
@@ -47,14 +50,43 @@ Be thorough. Extract every meaningful USP and term. Product documentation follow
 Return ONLY valid JSON, no markdown fences."""
 
 
-def extract_usps(document_text: str) -> dict:
-    response = get_client().chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": "You return only valid JSON."},
-            {"role": "user", "content": EXTRACTION_PROMPT.format(document_text=document_text)},
-        ],
-        temperature=0.2,
-        response_format={"type": "json_object"},
-    )
-    return json.loads(response.choices[0].message.content)
+EXTRACTION_MODEL = os.getenv("EXTRACTION_MODEL", "gpt-4o")
+# Documents up to this many characters start on FAST_MODEL.
+EXTRACTION_FAST_MAX_CHARS = int(os.getenv("EXTRACTION_FAST_MAX_CHARS", "12000"))
+
+
+def validate_section_extraction(result: dict):
+    # A single section (pricing, contact details, a glossary) often has no USPs.
+    for key in ("usps", "key_terms", "common_objections"):
+        if not isinstance(result.get(key), list):
+            return f"invalid_{key}"
+    if not isinstance(result.get("client_frames"), dict):
+        return "invalid_client_frames"
+    return None
+
+
+def validate_extraction(result: dict):
+    problem = validate_section_extraction(result)
+    if problem:
+        return problem
+    # A product document with no USPs at all is the fast tier missing them, not a real answer.
+    if not result["usps"]:
+        return "no_usps"
+    return None
+
+
+def extract_usps(document_text: str, validate=validate_extraction) -> dict:
+    def create(model: str):
+        response = get_client().chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You return only valid JSON."},
+                {"role": "user", "content": EXTRACTION_PROMPT.format(document_text=document_text)},
+            ],
+            temperature=0.2,
+            response_format={"type": "json_object"},
+        )
+        return response.choices[0].message.content, response.usage
+
+    tiers = route_tiers(len(document_text), EXTRACTION_FAST_MAX_CHARS, EXTRACTION_MODEL)
+    return complete_json(create, tiers, validate)
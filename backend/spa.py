@@ -0,0 +1,91 @@
+import mimetypes
+import os
+from pathlib import Path
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+HASHED_ASSET_PREFIX = "assets/"
+
+# Preferred first; must match the suffixes written by frontend/scripts/precompress.mjs.
+PRECOMPRESSED = [("br", ".br"), ("gzip", ".gz")]
+
+
+def accepted_encodings(header: str) -> set:
+    encodings = set()
+    for part in (header or "").split(","):
+        name, _, params = part.partition(";")
+        key, _, value = params.partition("=")
+        if key.strip() == "q":
+            try:
+                if float(value) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name.strip():
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+class StaticFile:
+    def __init__(self, path: Path, relative: str):
+        self.path = path
+        self.stat = os.stat(path)
+        self.media_type = mimetypes.guess_type(relative)[0] or "application/octet-stream"
+        self.variants = {}
+        for encoding, suffix in PRECOMPRESSED:
+            variant = path.with_name(path.name + suffix)
+            if variant.is_file():
+                self.variants[encoding] = (variant, os.stat(variant))
+        # Vite fingerprints everything under assets/, so those never change.
+        self.cache_control = (
+            IMMUTABLE_CACHE_CONTROL if relative.startswith(HASHED_ASSET_PREFIX) else REVALIDATE_CACHE_CONTROL
+        )
+
+
+class SPAFiles:
+    """Serves the built frontend from an index made once at startup.
+
+    Files are looked up in memory instead of stat-ing the disk per request,
+    precompressed variants are picked by Accept-Encoding, and index.html is
+    held in memory for the client-side routes.
+    """
+
+    def __init__(self, directory: Path):
+        self.files = {}
+        for path in directory.rglob("*"):
+            if not path.is_file() or path.suffix in {suffix for _, suffix in PRECOMPRESSED}:
+                continue
+            relative = path.relative_to(directory).as_posix()
+            self.files[relative] = StaticFile(path, relative)
+        self.index_html = (directory / "index.html").read_bytes()
+
+    def index_response(self) -> Response:
+        return Response(
+            self.index_html,
+            media_type="text/html",
+            headers={"Cache-Control": REVALIDATE_CACHE_CONTROL},
+        )
+
+    async def serve(self, request: Request, full_path: str):
+        static_file = self.files.get(full_path)
+        if static_file is None:
+            if full_path.startswith(HASHED_ASSET_PREFIX):
+                raise HTTPException(status_code=404, detail="Not found")
+            return self.index_response()
+        if full_path == "index.html":
+            return self.index_response()
+
+        headers = {"Cache-Control": static_file.cache_control}
+        path, stat = static_file.path, static_file.stat
+        if static_file.variants:
+            headers["Vary"] = "Accept-Encoding"
+            accepted = accepted_encodings(request.headers.get("accept-encoding"))
+            for encoding, _ in PRECOMPRESSED:
+                if encoding in accepted and encoding in static_file.variants:
+                    path, stat = static_file.variants[encoding]
+                    headers["Content-Encoding"] = encoding
+                    break
+        return FileResponse(path, stat_result=stat, media_type=static_file.media_type, headers=headers)
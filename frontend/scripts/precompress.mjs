@@ -0,0 +1,27 @@
+// Writes .br and .gz siblings for compressible build output so the backend
+// can serve them without compressing on every request.
+import { readdirSync, readFileSync, statSync, writeFileSync } from 'node:fs';
+import { join } from 'node:path';
+import { brotliCompressSync, gzipSync, constants } from 'node:zlib';
+
+const DIST = new URL('../dist/', import.meta.url).pathname;
+const COMPRESSIBLE = /\.(js|css|html|svg|json|txt|map)$/;
+const MIN_SIZE = 1024;
+
+function* walk(dir) {
+  for (const name of readdirSync(dir)) {
+    const path = join(dir, name);
+    if (statSync(path).isDirectory()) yield* walk(path);
+    else yield path;
+  }
+}
+
+for (const path of walk(DIST)) {
+  if (!COMPRESSIBLE.test(path)) continue;
+  const source = readFileSync(path);
+  if (source.length < MIN_SIZE) continue;
+  writeFileSync(`${path}.br`, brotliCompressSync(source, {
+    params: { [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY },
+  }));
+  writeFileSync(`${path}.gz`, gzipSync(source, { level: 9 }));
+}
@@ -16,6 +16,8 @@ export default function LiveCall() {
   const [duration, setDuration] = useState(0);
   const [messages, setMessages] = useState([]);
   const [aiSpeaking, setAiSpeaking] = useState(false);
+  const [liveMetrics, setLiveMetrics] = useState(null);
+  const [answerScores, setAnswerScores] = useState([]);
   const timerRef = useRef(null);
   const messagesEndRef = useRef(null);
 
@@ -69,6 +71,23 @@ export default function LiveCall() {
     };
   }, []);
 
+  useEffect(() => {
+    if (!vapiConfig) return;
+    const socket = api.openLiveCoaching(sessionId);
+    socket.onmessage = (e) => {
+      const event = JSON.parse(e.data);
+      if (event.type === 'snapshot') {
+        setLiveMetrics(event.metrics);
+        setAnswerScores(event.answer_scores);
+      } else if (event.type === 'metrics') {
+        setLiveMetrics(event.metrics);
+      } else if (event.type === 'answer_score') {
+        setAnswerScores((prev) => [...prev, event.answer_score]);
+      }
+    };
+    return () => socket.close();
+  }, [sessionId]);
+
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   }, [messages]);
@@ -150,6 +169,25 @@ export default function LiveCall() {
         )}
       </div>
 
+      {/* Live coaching */}
+      {liveMetrics && (
+        <div className="bg-[#1e293b] border-t border-slate-700 px-6 py-3 flex items-center gap-6 text-sm">
+          <span className={liveMetrics.current_answer_words > liveMetrics.word_threshold ? 'text-amber-400' : 'text-slate-300'}>
+            Answer length: <span className="font-mono">{liveMetrics.current_answer_words}/{liveMetrics.word_threshold}</span> words
+          </span>
+          <span className="text-slate-300">
+            Rambling: <span className="font-mono">{liveMetrics.rambling_count}</span>
+          </span>
+          {answerScores.length > 0 && (
+            <span className="text-slate-400 truncate">
+              Last answer: <span className="font-mono text-indigo-300">
+                {Math.round(answerScores[answerScores.length - 1].conciseness)}
+              </span> conciseness — {answerScores[answerScores.length - 1].feedback}
+            </span>
+          )}
+        </div>
+      )}
+
       {/* Transcript panel */}
       <div className="bg-[#1e293b] border-t border-slate-700 max-h-48 overflow-y-auto px-6 py-4">
         {messages.length === 0 ? (
@@ -17,6 +17,13 @@ const DIMENSION_LABELS = {
 };
 
 function ScoreBadge({ score }) {
+  if (score == null) {
+    return (
+      <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-sm font-semibold text-slate-500 bg-slate-500/10">
+        …
+      </span>
+    );
+  }
   let color = 'text-red-400 bg-red-400/10';
   if (score >= 80) color = 'text-green-400 bg-green-400/10';
   else if (score >= 60) color = 'text-amber-400 bg-amber-400/10';
@@ -39,10 +46,12 @@ export default function Scorecard() {
       try {
         const data = await api.getSession(sessionId);
         setSession(data);
-        if (data.status === 'completed' && data.scores) {
-          setLoading(false);
-        } else {
+        // Partial scores stream in while the model is still writing; show them and keep polling.
+        if (data.scores) setLoading(false);
+        if (data.status !== 'completed' || !data.scores) {
           setTimeout(poll, 3000);
+        } else if (data.scores.status === 'scoring') {
+          setTimeout(poll, 1000);
         }
       } catch (err) {
         setError(err.message);
@@ -72,6 +81,7 @@ export default function Scorecard() {
 
   const scores = session.scores;
   const feedback = scores?.detailed_feedback || {};
+  const scoring = scores?.status === 'scoring';
 
   const radarData = Object.entries(DIMENSION_LABELS).map(([key, label]) => ({
     dimension: label,
@@ -94,11 +104,18 @@ export default function Scorecard() {
           </p>
         </div>
         <div className="text-right">
-          <div className="text-4xl font-bold text-white">{Math.round(scores?.overall || 0)}</div>
+          <div className="text-4xl font-bold text-white">{scores?.overall == null ? '—' : Math.round(scores.overall)}</div>
           <div className="text-sm text-slate-400">Overall Score</div>
         </div>
       </div>
 
+      {scoring && (
+        <div className="bg-indigo-500/10 border border-indigo-500/30 rounded-xl p-4 mb-8 flex items-center gap-3">
+          <Loader2 className="w-5 h-5 text-indigo-400 animate-spin flex-shrink-0" />
+          <p className="text-sm text-indigo-300">Still scoring — results appear here as each one is ready.</p>
+        </div>
+      )}
+
       {/* Radar chart + dimension scores */}
       <div className="grid grid-cols-1 lg:grid-cols-2 gap-6 mb-8">
         <div className="bg-[#1e293b] rounded-xl p-6 border border-slate-700">
@@ -117,7 +134,7 @@ export default function Scorecard() {
           <h3 className="text-sm font-semibold text-slate-400 uppercase tracking-wide mb-4">Dimension Breakdown</h3>
           <div className="space-y-4">
             {Object.entries(DIMENSION_LABELS).map(([key, label]) => {
-              const val = scores?.[key] || 0;
+              const val = scores?.[key] ?? null;
               let barColor = 'bg-red-500';
               if (val >= 80) barColor = 'bg-green-500';
               else if (val >= 60) barColor = 'bg-amber-500';
@@ -129,7 +146,7 @@ export default function Scorecard() {
                     <ScoreBadge score={val} />
                   </div>
                   <div className="w-full h-2 bg-slate-700 rounded-full overflow-hidden">
-                    <div className={`h-full rounded-full ${barColor} transition-all duration-500`} style={{ width: `${val}%` }} />
+                    <div className={`h-full rounded-full ${barColor} transition-all duration-500`} style={{ width: `${val || 0}%` }} />
                   </div>
                 </div>
               );
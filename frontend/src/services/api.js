@@ -60,6 +60,12 @@ export const api = {
     return request('/products/upload', { method: 'POST', body: form });
   },
 
+  updateProductDocument(id, file) {
+    const form = new FormData();
+    form.append('file', file);
+    return request(`/products/${id}/document`, { method: 'PUT', body: form });
+  },
+
   getProducts() {
     return request('/products/');
   },
@@ -83,6 +89,13 @@ export const api = {
     });
   },
 
+  createSessionsBatch(productId, sessions) {
+    return request('/sessions/batch', {
+      method: 'POST',
+      body: JSON.stringify({ product_id: productId, sessions }),
+    });
+  },
+
   updateCallId(sessionId, vapiCallId) {
     return request(`/sessions/${sessionId}/call-id`, {
       method: 'PATCH',
@@ -98,6 +111,13 @@ export const api = {
     return request(`/sessions/${id}`);
   },
 
+  openLiveCoaching(sessionId) {
+    const base = new URL(API_BASE || window.location.origin, window.location.href);
+    base.protocol = base.protocol === 'https:' ? 'wss:' : 'ws:';
+    const url = `${base.origin}/sessions/${sessionId}/live?token=${encodeURIComponent(getToken() || '')}`;
+    return new WebSocket(url);
+  },
+
   getDashboard() {
     return request('/scores/dashboard');
   },
@@ -8,9 +8,11 @@ export default defineConfig({
     proxy: {
       '/auth': 'http://localhost:8000',
       '/products': 'http://localhost:8000',
-      '/sessions': 'http://localhost:8000',
+      '/sessions': { target: 'http://localhost:8000', ws: true },
       '/scores': 'http://localhost:8000',
       '/webhook': 'http://localhost:8000',
+      '/search': 'http://localhost:8000',
+      '/export': 'http://localhost:8000',
     },
   },
 })